@@ -0,0 +1,87 @@
+# benchmarks/bench_paper_memory.py
+"""
+Compares the memory held by a corpus loaded as ``Paper`` records against the free-form
+dicts the fetchers used to produce, and the time to convert records from and to JSON, both
+for legacy records and for records stored by ``Paper.to_dict``.
+
+Usage: python -m benchmarks.bench_paper_memory [--records 200000]
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from paper_fetcher.paper import Paper
+
+JOURNALS = ["Nature", "Cell", "Science", "The Lancet", "PLoS One", "Scientific Reports",
+            "Journal of Machine Learning Research", "IEEE Transactions on Pattern Analysis"]
+
+
+def legacy_record(i, rng):
+    """A record shaped like the ones the fetchers built before ``Paper``, placeholders included."""
+    journal = rng.randrange(len(JOURNALS))
+    if i % 3 == 0:  # PubMed
+        return {"issn": f"{1000 + journal:04d}-{2000 + journal:04d}", "title": f"Paper title number {i}",
+                "authors": "Ada Lovelace, Alan Turing", "abstract": "Background. " * rng.randrange(5, 40),
+                "year": str(2000 + i % 25), "journal": JOURNALS[journal], "volume": str(i % 90),
+                "pages": "N/A", "number": "N/A", "publisher": "N/A", "doi": f"10.1000/{i}",
+                "url": str(30000000 + i), "date": f"{2000 + i % 25}-01-01"}
+    if i % 3 == 1:  # arXiv
+        return {"title": f"Paper title number {i}", "author": "Ada Lovelace, Alan Turing",
+                "abstract": "We propose. " * rng.randrange(5, 40), "year": str(2000 + i % 25),
+                "date": f"{2000 + i % 25}-01-01", "url": f"http://arxiv.org/abs/2101.{i:05d}v1"}
+    return {"title": f"Paper title number {i}", "author": "Ada Lovelace, Alan Turing",  # CrossRef
+            "year": 2000 + i % 25, "date": f"{2000 + i % 25}-01-01", "doi": f"10.2000/{i}",
+            "journal": JOURNALS[journal], "issn": "", "url": f"https://doi.org/10.2000/{i}"}
+
+
+def measure(load, payload):
+    """Returns the memory retained by the loaded corpus, the peak during loading, and the time."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    corpus = load(payload)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return corpus, current, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    # Records reach memory through json.loads, which does not share equal strings.
+    payload = [json.dumps(legacy_record(i, rng)) for i in range(args.records)]
+
+    dicts, dict_memory, dict_peak, dict_time = measure(lambda lines: [json.loads(line) for line in lines], payload)
+    papers, paper_memory, paper_peak, paper_time = measure(
+        lambda lines: [Paper.from_dict(json.loads(line)) for line in lines], payload)
+    # Records written by Paper.to_dict, as read back from a results file.
+    stored_payload = [json.dumps(paper.to_dict()) for paper in papers]
+    stored, stored_memory, stored_peak, stored_time = measure(
+        lambda lines: [Paper.from_dict(json.loads(line)) for line in lines], stored_payload)
+
+    start = time.perf_counter()
+    for record in dicts:
+        json.dumps(record)
+    dict_dump = time.perf_counter() - start
+    start = time.perf_counter()
+    for paper in papers:
+        json.dumps(paper.to_dict())
+    paper_dump = time.perf_counter() - start
+
+    print(f"{args.records:,} records")
+    for name, memory, peak, load_time, dump_time in (("dict", dict_memory, dict_peak, dict_time, dict_dump),
+                                                      ("Paper", paper_memory, paper_peak, paper_time, paper_dump),
+                                                      ("stored", stored_memory, stored_peak, stored_time, paper_dump)):
+        print(f"  {name:<6}: {memory / 1e6:7.1f} MB retained ({memory / args.records:5.0f} B/record), "
+              f"peak {peak / 1e6:7.1f} MB, load {args.records / load_time:>9,.0f} rec/s, "
+              f"dump {args.records / dump_time:>9,.0f} rec/s")
+    print(f"  Paper records use {1 - paper_memory / dict_memory:.0%} less memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+# benchmarks/bench_replay.py
+"""
+Replays recorded arXiv, PubMed, CrossRef and Google Scholar payloads through a local stub
+server and measures each fetcher end to end: throughput, per-stage timings and peak memory,
+at several result scales, flagging regressions against a stored baseline.
+
+Usage: python -m benchmarks.bench_replay [--platforms arxiv,pubmed,crossref,google_scholar]
+       [--scales 10,1000,100000] [--latency 0.0] [--throttle_rate 0.0] [--storage jsonl]
+       [--baseline benchmarks/replay_baseline.json] [--save_baseline] [--tolerance 0.25]
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qs
+
+from benchmarks.stub_server import StubServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "replay_baseline.json")
+PLATFORMS = ("arxiv", "pubmed", "crossref", "google_scholar")
+
+# Google Scholar serves 10 results per page plus one detail request per paper; real
+# harvests stay far below 100k results, so larger scales are skipped unless asked for.
+# PubMed's esearch returns at most 10,000 PMIDs per query; larger harvests need --split,
+# which the stub does not model.
+SCALE_LIMITS = {"google_scholar": 1000, "pubmed": 10000}
+
+# Placeholder replaced by the record number in the record templates, keeping replayed records distinct.
+MARKER = "@@N@@"
+
+# Cases faster than this are too noisy to compare on throughput; only their memory is compared.
+MIN_COMPARED_SECONDS = 0.5
+
+# Timing histograms reported as stages, in pipeline order.
+STAGES = {
+    "http": "http_request_seconds",
+    "wait": "rate_limit_wait_seconds",
+    "parse": "parse_seconds",
+    "dedup": "dedup_seconds",
+    "save": "save_seconds",
+}
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        return f.read().decode('utf-8')
+
+
+def split_fixture(document, item_pattern):
+    """Splits a fixture document into its head, its items and its tail."""
+    items = re.findall(item_pattern, document, re.S)
+    head = document[:document.index(items[0])]
+    tail = document[document.rindex(items[-1]) + len(items[-1]):]
+    return head, items, tail
+
+
+def arxiv_templates():
+    head, entries, tail = split_fixture(read_fixture("arxiv_atom.xml"), r"\s*<entry>.*?</entry>")
+    templates = []
+    for entry in entries:
+        arxiv_id = re.search(r"arxiv\.org/abs/([^<]+?)v\d+<", entry).group(1)
+        entry = entry.replace(arxiv_id, f"replay.{MARKER}").replace("</title>", f" ({MARKER})</title>", 1)
+        templates.append(entry)
+    return head, templates, tail
+
+
+def pubmed_templates():
+    head, articles, tail = split_fixture(read_fixture("pubmed_efetch.xml"),
+                                         r"<PubmedArticle>.*?</PubmedArticle>\s*")
+    templates = []
+    for article in articles:
+        pmid = re.search(r"<PMID[^>]*>(\d+)</PMID>", article).group(1)
+        article = article.replace(pmid, MARKER)
+        for doi in set(re.findall(r'EIdType="doi"[^>]*>([^<]+)<', article)):
+            article = article.replace(doi, f"{doi}.{MARKER}")
+        templates.append(article.replace("</ArticleTitle>", f" ({MARKER})</ArticleTitle>", 1))
+    return head, templates, tail
+
+
+def crossref_templates():
+    document = json.loads(read_fixture("crossref_works.json"))
+    templates = []
+    for item in document["message"]["items"]:
+        item = dict(item, DOI=f"{item['DOI']}.{MARKER}", URL=f"{item['URL']}.{MARKER}",
+                    title=[f"{item['title'][0]} ({MARKER})"])
+        templates.append(json.dumps(item, ensure_ascii=False))
+    return document, templates
+
+
+def scholar_templates():
+    publications = json.loads(read_fixture("scholar_publications.json"))
+    templates = {}
+    for kind, records in publications.items():
+        templates[kind] = []
+        for record in records:
+            record = dict(record, bib=dict(record["bib"], title=f"{record['bib']['title']} ({MARKER})"),
+                          eprint_url=f"{record['eprint_url']}?replay={MARKER}", gsrank=MARKER)
+            templates[kind].append(json.dumps(record, ensure_ascii=False).replace(f'"{MARKER}"', MARKER))
+    return templates
+
+
+def render(templates, number):
+    return templates[number % len(templates)].replace(MARKER, str(number))
+
+
+class ReplayHandler:
+    """
+    Stub server handler serving any number of distinct records generated from the fixtures.
+
+    Request paths are ``/n<total>/<platform>/...``: the result set of each request holds
+    ``total`` records, numbered from 1. Every ``1 / throttle_rate``-th request is answered
+    with a 429 and ``Retry-After: 0`` instead.
+    """
+
+    def __init__(self, throttle_rate=0.0):
+        self.throttle_every = round(1 / throttle_rate) if throttle_rate else 0
+        self.throttled = 0
+        self._requests = itertools.count(1)
+        self._lock = threading.Lock()
+        self.arxiv = arxiv_templates()
+        self.pubmed = pubmed_templates()
+        self.esearch = json.loads(read_fixture("pubmed_esearch.json"))
+        self.crossref = crossref_templates()
+        self.scholar = scholar_templates()
+
+    def __call__(self, method, path, query, body):
+        with self._lock:
+            number = next(self._requests)
+            if self.throttle_every and number % self.throttle_every == 0:
+                self.throttled += 1
+                return 429, b"", {"Retry-After": "0"}
+        _, total, platform, endpoint = path.split("/", 3)
+        params = {name: values[-1] for name, values in parse_qs(query).items()}
+        if method == "POST":
+            params.update((name, values[-1]) for name, values in parse_qs(body.decode()).items())
+        route = getattr(self, f"_{platform}")
+        return route(endpoint, int(total[1:]), params)
+
+    def _arxiv(self, endpoint, total, params):
+        head, templates, tail = self.arxiv
+        start = int(params.get("start", 0))
+        end = min(total, start + int(params.get("max_results", 10)))
+        body = head + "".join(render(templates, number) for number in range(start + 1, end + 1)) + tail
+        return 200, body.encode("utf-8"), {"Content-Type": "application/atom+xml"}
+
+    def _pubmed(self, endpoint, total, params):
+        if endpoint.startswith("esearch"):
+            start = int(params.get("retstart", 0))
+            end = min(total, start + int(params.get("retmax", 20)))
+            result = dict(self.esearch["esearchresult"], count=str(total), retstart=str(start),
+                          retmax=str(end - start), idlist=[str(n) for n in range(start + 1, end + 1)])
+            body = json.dumps(dict(self.esearch, esearchresult=result))
+            return 200, body.encode("utf-8"), {"Content-Type": "application/json"}
+        head, templates, tail = self.pubmed
+        numbers = [int(n) for n in params.get("id", "").split(",") if n]
+        body = head + "".join(render(templates, number) for number in numbers if number <= total) + tail
+        return 200, body.encode("utf-8"), {"Content-Type": "text/xml"}
+
+    def _crossref(self, endpoint, total, params):
+        document, templates = self.crossref
+        cursor = params.get("cursor", "*")
+        start = 0 if cursor == "*" else int(cursor)
+        end = min(total, start + int(params.get("rows", 20)))
+        message = dict(document["message"], items=[], **{"total-results": total, "next-cursor": str(end)})
+        head, tail = json.dumps(dict(document, message=message)).split('"items": []')
+        items = ",".join(render(templates, number) for number in range(start + 1, end + 1))
+        return 200, f'{head}"items": [{items}]{tail}'.encode("utf-8"), {"Content-Type": "application/json"}
+
+    def _scholar(self, endpoint, total, params):
+        if endpoint == "search":
+            start = int(params.get("start", 0))
+            end = min(total, start + 10)
+            records = self.scholar["search"]
+            body = "[" + ",".join(render(records, number) for number in range(start + 1, end + 1)) + "]"
+        else:
+            body = render(self.scholar["filled"], int(params["id"]))
+        return 200, body.encode("utf-8"), {"Content-Type": "application/json"}
+
+
+class ReplaySearch:
+    """Iterator over the results of a replayed Scholar search, fetched ten at a time."""
+
+    def __init__(self, client):
+        self.client = client
+        self.start = 0
+        self.page = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.page:
+            # A failed page raises without advancing, so the caller can retry it.
+            self.page = self.client.get("search", start=self.start)
+            if not self.page:
+                raise StopIteration
+            self.start += len(self.page)
+        return self.page.pop(0)
+
+
+class ReplayScholar:
+    """
+    Takes the place of the ``scholarly`` module in the Google Scholar fetcher: searches and
+    fills are served by the stub server from recorded publication dicts, and throttled
+    answers raise like ``scholarly`` does when Scholar blocks it.
+    """
+
+    def __init__(self, base_url):
+        import requests
+
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def get(self, endpoint, **params):
+        response = self.session.get(f"{self.base_url}/{endpoint}", params=params, timeout=30)
+        if response.status_code != 200:
+            raise Exception(f"Google Scholar answered {response.status_code}")
+        return response.json()
+
+    def search_pubs(self, query):
+        return ReplaySearch(self)
+
+    def fill(self, publication):
+        return self.get("fill", id=publication["gsrank"])
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (``ru_maxrss`` is in KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def create_fetcher(platform, base_url, storage):
+    """Creates a fetcher of ``platform`` whose requests go to the replay server."""
+    from paper_fetcher.rate_limit import RateLimiter
+    from paper_fetcher.registry import get_fetcher_class
+    from paper_fetcher.transport import Transport
+
+    # Everything is served from 127.0.0.1: lift the API rate limits, keep the retry logic.
+    limiter = RateLimiter(rates={"127.0.0.1": 1e6, "scholar.google.com": 1e6})
+    transport = Transport(rate_limiter=limiter)
+    json_file_name = f"replay_{platform}.{storage}"
+    if platform == "google_scholar":
+        from paper_fetcher import google_scholar_fetcher
+
+        google_scholar_fetcher.scholarly = ReplayScholar(f"{base_url}/scholar")
+    fetcher = get_fetcher_class(platform)(json_file_name, transport=transport, enrich=False)
+    if platform == "arxiv":
+        fetcher.API_URL = f"{base_url}/arxiv/query"
+    elif platform == "pubmed":
+        fetcher.ESEARCH_URL = f"{base_url}/pubmed/esearch.fcgi"
+        fetcher.EFETCH_URL = f"{base_url}/pubmed/efetch.fcgi"
+    elif platform == "crossref":
+        fetcher.base_url = f"{base_url}/crossref/works"
+    else:
+        fetcher.base_timeout = 0.01
+    return fetcher
+
+
+def run_case(platform, scale, base_url, storage):
+    """Runs one fetch in this process and returns its measurements."""
+    from paper_fetcher.metrics import Metrics, set_metrics
+
+    try:
+        fetcher = create_fetcher(platform, f"{base_url}/n{scale}", storage)
+    except ImportError as e:
+        return {"skipped": f"cannot import the {platform} fetcher: {e}"}
+    metrics = Metrics()
+    set_metrics(metrics)
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    code = fetcher.execute({"keyword": "machine learning", "author": "", "journal": "", "year": ""}, scale)
+    elapsed = time.perf_counter() - start
+    report = metrics.report()
+    histograms = report["histograms"]
+    return {
+        "code": code,
+        "stored": sum(1 for _ in fetcher.storage.iter_records()),
+        "seconds": elapsed,
+        "throughput": scale / elapsed,
+        "stages": {stage: sum(series["sum"] for series in histograms.get(metric, []))
+                   for stage, metric in STAGES.items()},
+        "requests": sum(series["count"] for series in histograms.get("http_request_seconds", [])),
+        "retries": metrics.counter("http_retries_total"),
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_growth_mb": peak_rss_mb() - rss_before,
+    }
+
+
+def run_isolated(platform, scale, base_url, storage):
+    """Runs a case in a fresh interpreter in a scratch directory, so peak memory is its own."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (root, os.environ.get("PYTHONPATH")))))
+    with tempfile.TemporaryDirectory(prefix="bench_replay_") as scratch:
+        process = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_replay", "--case", platform, str(scale), base_url, storage],
+            cwd=scratch, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        return {"skipped": f"case failed: {process.stderr.strip().splitlines()[-1:]}"}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """Returns the cases slower or larger than the baseline by more than ``tolerance``."""
+    regressions = []
+    for case, result in results.items():
+        reference = baseline.get("results", {}).get(case)
+        if not reference or "skipped" in result or "skipped" in reference:
+            continue
+        timed = min(result["seconds"], reference["seconds"]) >= MIN_COMPARED_SECONDS
+        if timed and result["throughput"] < reference["throughput"] * (1 - tolerance):
+            regressions.append(f"{case}: throughput {result['throughput']:,.0f} rec/s, "
+                               f"baseline {reference['throughput']:,.0f} rec/s")
+        if result["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{case}: peak memory {result['peak_rss_mb']:.0f} MB, "
+                               f"baseline {reference['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--platforms", type=str, default=",".join(PLATFORMS))
+    parser.add_argument("--scales", type=str, default="10,1000,100000")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument("--throttle_rate", type=float, default=0.0,
+                        help="Fraction of requests answered with a 429, e.g. 0.05.")
+    parser.add_argument("--storage", type=str, default="jsonl", choices=["json", "jsonl", "db"])
+    parser.add_argument("--no_scale_limits", action="store_true",
+                        help=f"Also run the scales above {SCALE_LIMITS}.")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE)
+    parser.add_argument("--save_baseline", action="store_true", help="Store the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Relative throughput drop or memory growth reported as a regression.")
+    parser.add_argument("--case", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        platform, scale, base_url, storage = args.case
+        print(json.dumps(run_case(platform, int(scale), base_url, storage)))
+        return
+
+    settings = {"latency": args.latency, "throttle_rate": args.throttle_rate, "storage": args.storage}
+    scales = [int(scale) for scale in args.scales.split(",")]
+    handler = ReplayHandler(args.throttle_rate)
+    results = {}
+    failures = []
+    print(f"latency {args.latency * 1000:.0f} ms, throttle rate {args.throttle_rate:.0%}, {args.storage} storage")
+    print(f"{'case':<22}{'rec/s':>10}{'wall s':>8}{'http':>8}{'wait':>7}{'parse':>7}{'dedup':>7}"
+          f"{'save':>7}{'reqs':>7}{'retry':>6}{'peak MB':>9}")
+    with StubServer(handler, latency=args.latency) as server:
+        for platform, scale in itertools.product(args.platforms.split(","), scales):
+            case = f"{platform}@{scale}"
+            if scale > SCALE_LIMITS.get(platform, scale) and not args.no_scale_limits:
+                results[case] = {"skipped": "above the scale limit, see --no_scale_limits"}
+            else:
+                results[case] = run_isolated(platform, scale, server.base_url, args.storage)
+            result = results[case]
+            if "skipped" in result:
+                print(f"{case:<22}skipped: {result['skipped']}")
+                continue
+            stages = result["stages"]
+            print(f"{case:<22}{result['throughput']:>10,.0f}{result['seconds']:>8.2f}"
+                  + "".join(f"{stages[stage]:>{8 if stage == 'http' else 7}.2f}" for stage in STAGES)
+                  + f"{result['requests']:>7}{result['retries']:>6}{result['peak_rss_mb']:>9.0f}")
+            if result["stored"] != scale or result["code"] != 0:
+                failures.append(f"{case}: stored {result['stored']} of {scale} records (exit code {result['code']})")
+                print(f"  ERROR {failures[-1]}")
+    print("Stage timings are summed over threads; 'http' can exceed the wall time.")
+    if failures:
+        sys.exit(1)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            measured = {case: result for case, result in results.items() if "skipped" not in result}
+            json.dump({"settings": settings, "results": measured}, f, indent=4)
+        print(f"Saved baseline to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != settings:
+        print(f"Warning: baseline recorded with {baseline.get('settings')}, not {settings}")
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regression against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
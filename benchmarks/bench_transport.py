@@ -0,0 +1,50 @@
+# benchmarks/bench_transport.py
+"""
+Compares bare ``requests.get`` calls issued serially (the previous fetcher behaviour)
+with the pooled, concurrent shared transport against a local stub server.
+
+Usage: python -m benchmarks.bench_transport [--requests 40] [--latency 0.05]
+"""
+import argparse
+import time
+
+import requests
+
+from benchmarks.stub_server import StubServer
+from paper_fetcher.rate_limit import RateLimiter
+from paper_fetcher.transport import Transport
+
+
+def ok_handler(method, path, query, body):
+    return 200, b'{"message": {"ISSN": ["1234-5678"]}}', {"Content-Type": "application/json"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with StubServer(ok_handler, latency=args.latency) as server:
+        urls = [f"{server.base_url}/works/10.1/{i}" for i in range(args.requests)]
+
+        start = time.perf_counter()
+        for url in urls:
+            requests.get(url, timeout=10).json()
+        serial = time.perf_counter() - start
+
+        # Lift the default per-host rate limit, which would otherwise pace the stub like a real API.
+        transport = Transport(host_limits={"127.0.0.1": 8},
+                              rate_limiter=RateLimiter(rates={"127.0.0.1": 1e6}))
+        start = time.perf_counter()
+        transport.map(lambda url: transport.get(url).json(), urls)
+        pooled = time.perf_counter() - start
+        transport.close()
+
+    print(f"{args.requests} requests, {args.latency * 1000:.0f} ms latency")
+    print(f"  serial requests.get : {serial:.3f}s")
+    print(f"  pooled transport    : {pooled:.3f}s ({serial / pooled:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/bench_xml_parsing.py
+"""
+Benchmarks the incremental arXiv and PubMed XML parsers against the previous
+``ElementTree.fromstring`` + ``findtext`` implementations on recorded fixture payloads,
+reporting throughput and peak memory and checking that both produce the same records.
+
+Usage: python -m benchmarks.bench_xml_parsing [--records 5000] [--repeat 3]
+"""
+import argparse
+import os
+import re
+import time
+import tracemalloc
+from xml.etree import ElementTree as ET
+
+from paper_fetcher.arxiv_fetcher import ArXivFetcher
+from paper_fetcher.paper import Paper
+from paper_fetcher.pubmed_fetcher import PubMedFetcher
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+def legacy_parse_arxiv(xml_content):
+    """The arXiv parser before incremental parsing."""
+    root = ET.fromstring(xml_content)
+    papers = []
+    for entry in root.findall(f"{ATOM}entry"):
+        papers.append({
+            "title": entry.find(f"{ATOM}title").text,
+            "author": ', '.join(author.find(f"{ATOM}name").text for author in entry.findall(f"{ATOM}author")),
+            "abstract": entry.find(f"{ATOM}summary").text.strip(),
+            "year": entry.find(f"{ATOM}published").text.split('-')[0],
+            "date": entry.find(f"{ATOM}published").text[:10],
+            "url": entry.find(f"{ATOM}id").text,
+        })
+    return papers
+
+
+def legacy_parse_pubmed(xml_content):
+    """The PubMed parser before incremental parsing: one ``findtext`` scan per field."""
+    root = ET.fromstring(xml_content)
+    papers = []
+    for article in root.findall("PubmedArticle"):
+        entrez = article.find(".//PubMedPubDate[@PubStatus='entrez']")
+        papers.append({
+            "issn": article.findtext(".//ISSN", "N/A"),
+            "title": article.findtext(".//ArticleTitle", "N/A"),
+            "authors": ', '.join(filter(None, (
+                ' '.join(filter(None, (author.findtext('ForeName'), author.findtext('LastName'))))
+                or author.findtext('CollectiveName') for author in article.findall(".//Author")))),
+            "abstract": article.findtext(".//Abstract/AbstractText", "N/A"),
+            "year": article.findtext(".//PubDate/Year", "N/A"),
+            "journal": article.findtext(".//Journal/Title", "N/A"),
+            "volume": article.findtext(".//Journal/Volume", "N/A"),
+            "pages": article.findtext(".//Pagination/MedlinePgn", "N/A"),
+            "number": article.findtext(".//Journal/Issue", "N/A"),
+            "publisher": article.findtext(".//PublisherName", "N/A"),
+            "doi": article.findtext(".//ELocationID[@EIdType='doi']", "N/A"),
+            "url": article.findtext(".//ArticleId[@IdType='pubmed']", "N/A"),
+            "date": PubMedFetcher._entrez_date(entrez),
+        })
+    return papers
+
+
+def comparable(record):
+    """Returns a record as a dict with placeholders dropped; the PMID is compared through ``url``."""
+    record = Paper.coerce(record).to_dict()
+    record.pop("pmid", None)
+    return record
+
+
+def scale_fixture(name, item_pattern, records):
+    """Repeats the items of a fixture document until it holds ``records`` items."""
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        document = f.read().decode('utf-8')
+    items = re.findall(item_pattern, document, re.S)
+    head = document[:document.index(items[0])]
+    tail = document[document.rindex(items[-1]) + len(items[-1]):]
+    body = ''.join(items[i % len(items)] for i in range(records))
+    return (head + body + tail).encode('utf-8')
+
+
+def measure(parse, payload, repeat):
+    """Returns the best wall time over ``repeat`` runs, the peak traced memory and the result."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parse(payload)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    parse(payload)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    arxiv = ArXivFetcher.__new__(ArXivFetcher)
+    pubmed = PubMedFetcher.__new__(PubMedFetcher)
+    cases = [
+        ("arXiv Atom", scale_fixture("arxiv_atom.xml", r"\s*<entry>.*?</entry>", args.records),
+         legacy_parse_arxiv, arxiv._parse_paper_info),
+        ("PubMed efetch", scale_fixture("pubmed_efetch.xml", r"<PubmedArticle>.*?</PubmedArticle>\s*", args.records),
+         legacy_parse_pubmed, pubmed._parse_article_details),
+    ]
+    print(f"{args.records} records per payload, best of {args.repeat}")
+    for label, payload, legacy, current in cases:
+        legacy_time, legacy_peak, legacy_result = measure(legacy, payload, args.repeat)
+        current_time, current_peak, current_result = measure(current, payload, args.repeat)
+        assert list(map(comparable, legacy_result)) == list(map(comparable, current_result)), \
+            f"{label}: parsers disagree"
+        print(f"{label} ({len(payload) / 1e6:.1f} MB)")
+        for name, elapsed, peak in (("fromstring", legacy_time, legacy_peak),
+                                    ("iterparse", current_time, current_peak)):
+            print(f"  {name:<10}: {args.records / elapsed:>9,.0f} records/s, peak {peak / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
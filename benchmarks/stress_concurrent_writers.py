@@ -0,0 +1,97 @@
+# benchmarks/stress_concurrent_writers.py
+"""
+Stress test for several processes saving papers to one results file at once: each worker
+fetches an overlapping range of synthetic papers in small batches, and the stored file must
+end up holding every paper exactly once.
+
+Usage: python -m benchmarks.stress_concurrent_writers [--workers 8] [--papers 1000]
+       [--batch_size 25] [--storage json,jsonl,db]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from paper_fetcher.abstract_fetcher import AbstractPaperFetcher
+from paper_fetcher.dedup import paper_keys
+from paper_fetcher.paper import Paper
+
+
+def synthetic_paper(number):
+    return Paper(title=f"Synthetic paper number {number}", authors="Ada Lovelace, Alan Turing",
+                 year=2024, date="2024-01-01", doi=f"10.9999/stress.{number}",
+                 journal="Journal of Concurrent Writes", url=f"https://doi.org/10.9999/stress.{number}")
+
+
+class SyntheticFetcher(AbstractPaperFetcher):
+    """Fetcher returning a fixed range of synthetic papers in random order."""
+
+    def __init__(self, json_file_name, numbers, **kwargs):
+        super().__init__(json_file_name, **kwargs)
+        self.numbers = numbers
+
+    def fetch_papers(self, search_params=None, max_results=10):
+        numbers = list(self.numbers)
+        random.shuffle(numbers)
+        return [synthetic_paper(number) for number in numbers]
+
+
+def worker_range(worker, papers):
+    """Papers fetched by a worker: each range overlaps half of the next worker's."""
+    start = worker * papers // 2
+    return range(start, start + papers)
+
+
+def run_worker(json_file_name, worker, papers, batch_size, barrier):
+    fetcher = SyntheticFetcher(json_file_name, worker_range(worker, papers), enrich=False)
+    fetcher.save_batch_size = batch_size
+    barrier.wait()
+    sys.exit(fetcher.execute(max_results=None))
+
+
+def stress(storage, workers, papers, batch_size):
+    """Runs the workers against one file of the given storage type and checks its contents."""
+    json_file_name = f"stress.{storage}"
+    barrier = multiprocessing.Barrier(workers)
+    processes = [multiprocessing.Process(target=run_worker, args=(json_file_name, worker, papers, batch_size, barrier))
+                 for worker in range(workers)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    expected = set().union(*(worker_range(worker, papers) for worker in range(workers)))
+    stored = SyntheticFetcher(json_file_name, [], enrich=False).storage.load()
+    keys = Counter(paper_keys(paper)[0] for paper in stored)
+    duplicated = [key for key, count in keys.items() if count > 1]
+    missing = {f"doi:10.9999/stress.{number}" for number in expected} - set(keys)
+    codes = Counter(process.exitcode for process in processes)
+    ok = not duplicated and not missing and 2 not in codes
+    print(f"{storage:<6}: {workers} workers, {len(stored)} stored of {len(expected)} distinct papers, "
+          f"{len(missing)} lost, {len(duplicated)} duplicated, exit codes {dict(codes)}, "
+          f"{elapsed:.1f}s -> {'OK' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--papers", type=int, default=1000, help="Papers fetched by each worker.")
+    parser.add_argument("--batch_size", type=int, default=25)
+    parser.add_argument("--storage", type=str, default="json,jsonl,db")
+    args = parser.parse_args()
+
+    # Fetchers write to results/ under the working directory; keep the runs out of the repository.
+    os.chdir(tempfile.mkdtemp(prefix="stress_writers_"))
+    results = [stress(storage, args.workers, args.papers, args.batch_size) for storage in args.storage.split(",")]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,21 @@
 import argparse
+import atexit
 import json
+import logging
+import os
+import signal
+import sys
 import time
 
-from paper_fetcher.arxiv_fetcher import ArXivFetcher
-from paper_fetcher.crossref_fetcher import CrossRefFetcher
-from paper_fetcher.google_scholar_fetcher import GoogleScholarFetcher
-from paper_fetcher.pubmed_fetcher import PubMedFetcher
-from paper_fetcher.utils import setup_logging
+from paper_fetcher.registry import create_fetcher, parse_platforms
+from paper_fetcher.utils import StartupProfile, setup_logging
+
+# Other modules are imported where they are used, so each command only pays for its own
+# dependencies; fetcher modules are imported by the registry for the selected platforms only.
 
 
 def main():
+    profile = StartupProfile()
     setup_logging()
 
     # Parse command line arguments
@@ -20,11 +26,10 @@ def main():
         "--platform",
         type=str,
         default="pubmed",
-        choices=["pubmed", "arxiv", "google_scholar",
-                 "crossref", ],
         help=(
             "The platform to fetch papers from. Options: 'pubmed', 'arxiv', 'google_scholar', "
-            "'crossref'. Default is 'pubmed'."
+            "'crossref', a comma-separated list of them, or 'all' to search every platform "
+            "concurrently and merge the results. Default is 'pubmed'."
         ),
     )
     parser.add_argument(
@@ -33,6 +38,17 @@ def main():
         default=f"papers_{int(time.time())}.json",
         help="The name of the JSON file to save the fetched papers.",
     )
+    parser.add_argument(
+        "--storage",
+        type=str,
+        default=None,
+        choices=["json", "jsonl", "sqlite"],
+        help=(
+            "Storage format of the results file: 'json' rewrites a JSON array, 'jsonl' appends "
+            "JSON Lines, 'sqlite' inserts into an indexed SQLite corpus. Default is inferred "
+            "from the file extension (.jsonl, .db/.sqlite)."
+        ),
+    )
     parser.add_argument(
         "--keyword",
         type=str,
@@ -63,25 +79,245 @@ def main():
         default=2,
         help="Maximum number of papers to fetch.",
     )
+    parser.add_argument(
+        "--no_fill",
+        action="store_true",
+        help=(
+            "Google Scholar only: return the metadata of the search result pages without "
+            "fetching each paper's detail page. Much faster, but abstracts are snippets."
+        ),
+    )
+    parser.add_argument(
+        "--enrich",
+        action="store_true",
+        help=(
+            "Fill missing ISSN, publisher, journal and citation count of new papers from "
+            "CrossRef before saving them (always on for 'google_scholar')."
+        ),
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Only fetch papers newer than the last harvest of the same query, resuming an "
+            "unfinished harvest from its last page. Supported for 'pubmed', 'arxiv' and 'crossref'."
+        ),
+    )
+    parser.add_argument(
+        "--split",
+        action="store_true",
+        help=(
+            "Split the search into publication-date slices that each fit the platform's "
+            "per-query cap (10,000 PMIDs for PubMed) and fetch them in parallel, so large "
+            "harvests are complete. Supported for 'pubmed', 'arxiv' and 'crossref'."
+        ),
+    )
+    parser.add_argument(
+        "--split_workers",
+        type=int,
+        default=4,
+        help="Number of date slices fetched at once with --split.",
+    )
     parser.add_argument(
         "--output_json",
         action="store_true",
         help="If set, outputs the fetched papers as JSON to the console instead of saving to a file.",
     )
 
+    parser.add_argument(
+        "--rate_limit_state",
+        type=str,
+        default=os.path.join("results", "rate_limits.json"),
+        help=(
+            "File holding the per-host rate limiter state, shared by all processes using the "
+            "same file. Pass an empty string to rate-limit this process only."
+        ),
+    )
+
+    parser.add_argument(
+        "--http_cache",
+        type=str,
+        default=os.path.join("results", "http_cache.sqlite"),
+        help=(
+            "SQLite file caching raw API responses between runs (per-platform TTLs, LRU "
+            "eviction). Pass an empty string to disable the cache."
+        ),
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+    daemon_parser = subparsers.add_parser(
+        "daemon",
+        help="Run the saved queries of a config file periodically in one long-running process.",
+    )
+    daemon_parser.add_argument(
+        "--config",
+        type=str,
+        required=True,
+        help="JSON file listing the saved queries, see FetchScheduler.from_config.",
+    )
+    daemon_parser.add_argument(
+        "--no_initial_run",
+        action="store_true",
+        help="Wait for each job's first scheduled time instead of running every job at startup.",
+    )
+
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help=(
+            "Run many searches read from a JSONL spec file in one process, printing one JSON "
+            "status line per spec. Top-level options such as --platform, --max_results and "
+            "--incremental are the defaults of each spec."
+        ),
+    )
+    batch_parser.add_argument(
+        "--specs",
+        type=str,
+        default="-",
+        help=(
+            "JSONL file with one search per line, e.g. {\"name\": \"ml\", \"platform\": "
+            "\"arxiv\", \"keyword\": \"machine learning\", \"max_results\": 50}. "
+            "Default '-' reads stdin."
+        ),
+    )
+    batch_parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Maximum number of specs running at once (per-platform limits also apply).",
+    )
+    batch_parser.add_argument(
+        "--per_spec",
+        action="store_true",
+        help=(
+            "Write each spec to its own results file named after the spec, with the extension "
+            "of --json_file_name, instead of writing every spec to --json_file_name."
+        ),
+    )
+
+    query_parser = subparsers.add_parser(
+        "query",
+        help="Filter the papers of a SQLite corpus and print them as JSON.",
+    )
+    query_parser.add_argument(
+        "--db",
+        type=str,
+        required=True,
+        help="Path of the SQLite corpus, e.g. results/corpus.db.",
+    )
+    query_parser.add_argument("--journal", type=str, default=None, help="Journal name (case-insensitive).")
+    query_parser.add_argument("--issn", type=str, default=None, help="Journal ISSN.")
+    query_parser.add_argument("--since", type=int, default=None, help="Earliest publication year.")
+    query_parser.add_argument("--until", type=int, default=None, help="Latest publication year.")
+    query_parser.add_argument("--has_doi", action="store_true", help="Only papers with a DOI.")
+    query_parser.add_argument(
+        "--text",
+        type=str,
+        default=None,
+        help="Full-text query over titles and abstracts (SQLite FTS5 syntax).",
+    )
+    query_parser.add_argument("--limit", type=int, default=None, help="Maximum number of papers.")
+    query_parser.add_argument(
+        "--format",
+        type=str,
+        default="jsonl",
+        choices=["jsonl", "json", "count"],
+        help="Print one JSON record per line, a JSON array, or only the number of matches.",
+    )
+
+    enrich_parser = subparsers.add_parser(
+        "enrich",
+        help="Fill missing ISSN, publisher, journal and citation count of a results file from CrossRef.",
+    )
+    enrich_parser.add_argument(
+        "--file",
+        type=str,
+        required=True,
+        help="Path of the results file (.json, .jsonl or .db), rewritten in place.",
+    )
+    enrich_parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=50,
+        help="Number of DOIs resolved per CrossRef request.",
+    )
+    enrich_parser.add_argument(
+        "--mailto",
+        type=str,
+        default=None,
+        help="Contact e-mail sent to CrossRef to use its polite pool.",
+    )
+
+    parser.add_argument(
+        "--profile_startup",
+        "--profile-startup",
+        action="store_true",
+        help="Log how long each startup phase took before the first request, and the heavy modules loaded.",
+    )
+
+    parser.add_argument(
+        "--metrics_report",
+        type=str,
+        default=None,
+        help=(
+            "Write a JSON run report at exit: request latency histograms, bytes, retries and "
+            "throttles per host, parse time per record, save time and run outcomes."
+        ),
+    )
+    parser.add_argument(
+        "--metrics_prometheus",
+        type=str,
+        default=None,
+        help="Write the same metrics at exit in the Prometheus text format, e.g. for a textfile collector.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=None,
+        help="Run under cProfile and write the stats to this file (view with 'python -m pstats').",
+    )
+
     args = parser.parse_args()
+    profile.mark("argument parsing")
+    setup_instrumentation(args)
+
+    setup_network(args)
+    profile.mark("network setup")
+
+    if args.command == "daemon":
+        run_daemon(args)
+        return
+    if args.command == "query":
+        run_query(args)
+        return
+    if args.command == "batch":
+        run_batch(args)
+        return
+    if args.command == "enrich":
+        run_enrich(args)
+        return
+
+    try:
+        platforms = parse_platforms(args.platform)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.split and (len(platforms) != 1 or platforms[0] not in ("pubmed", "arxiv", "crossref")):
+        parser.error("--split requires a single platform among 'pubmed', 'arxiv' and 'crossref'")
+    if args.split and args.incremental:
+        parser.error("--split and --incremental cannot be combined")
 
     # Select fetcher based on platform
-    if args.platform == "pubmed":
-        fetcher = PubMedFetcher(json_file_name=args.json_file_name)
-    elif args.platform == "arxiv":
-        fetcher = ArXivFetcher(json_file_name=args.json_file_name)
-    elif args.platform == "google_scholar":
-        fetcher = GoogleScholarFetcher(json_file_name=args.json_file_name)
-    elif args.platform == "crossref":
-        fetcher = CrossRefFetcher(json_file_name=args.json_file_name)
-    else:
-        raise ValueError(f"Unsupported platform: {args.platform}")
+    fetcher = create_fetcher(
+        args.platform,
+        json_file_name=args.json_file_name,
+        platform_options={"google_scholar": {"fill": not args.no_fill}},
+        storage=args.storage,
+        enrich=True if args.enrich else None,
+        split=args.split,
+        split_workers=args.split_workers,
+    )
+    profile.mark("fetcher construction")
+    if args.profile_startup:
+        profile.report()
 
     # Set search parameters from command line arguments
     search_params = {
@@ -102,8 +338,135 @@ def main():
         fetcher.run(
             search_params=search_params,
             max_results=args.max_results,
+            incremental=args.incremental,
         )
 
 
+def setup_instrumentation(args):
+    """Starts the profiler and registers the metrics exports, which run when the process exits."""
+    if args.profile:
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+
+        def dump_profile():
+            profiler.disable()
+            os.makedirs(os.path.dirname(args.profile) or ".", exist_ok=True)
+            profiler.dump_stats(args.profile)
+            logging.info(f"Wrote profile to {args.profile}; top functions by cumulative time:")
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(15)
+
+        atexit.register(dump_profile)
+        profiler.enable()
+    if args.metrics_report or args.metrics_prometheus:
+        from paper_fetcher.metrics import get_metrics
+
+        def export_metrics():
+            metrics = get_metrics()
+            metrics.log_summary()
+            if args.metrics_report:
+                metrics.write_report(args.metrics_report)
+                logging.info(f"Wrote metrics report to {args.metrics_report}")
+            if args.metrics_prometheus:
+                metrics.write_prometheus(args.metrics_prometheus)
+
+        atexit.register(export_metrics)
+
+
+def setup_network(args):
+    """Installs the shared rate limiter and, if enabled, the HTTP response cache."""
+    from paper_fetcher.rate_limit import RateLimiter, set_rate_limiter
+
+    if args.rate_limit_state:
+        os.makedirs(os.path.dirname(args.rate_limit_state) or ".", exist_ok=True)
+        set_rate_limiter(RateLimiter(state_path=args.rate_limit_state))
+    if args.http_cache:
+        from paper_fetcher.response_cache import ResponseCache
+        from paper_fetcher.transport import Transport, set_transport
+
+        os.makedirs(os.path.dirname(args.http_cache) or ".", exist_ok=True)
+        cache = ResponseCache(args.http_cache)
+        set_transport(Transport(cache=cache))
+        atexit.register(lambda: logging.info(f"HTTP cache: {cache.stats()}"))
+
+
+def run_query(args):
+    """Prints the papers of a SQLite corpus matching the query filters."""
+    from paper_fetcher.storage import SQLiteStorage
+
+    if not os.path.exists(args.db):
+        logging.error(f"No such corpus: {args.db}")
+        raise SystemExit(2)
+    papers = SQLiteStorage(args.db).query(
+        journal=args.journal, issn=args.issn, year_from=args.since, year_to=args.until,
+        has_doi=args.has_doi, text=args.text, limit=args.limit,
+    )
+    if args.format == "count":
+        print(sum(1 for _ in papers))
+    elif args.format == "json":
+        print(json.dumps([paper.to_dict() for paper in papers], ensure_ascii=False, indent=4))
+    else:
+        for paper in papers:
+            print(json.dumps(paper.to_dict(), ensure_ascii=False))
+
+
+def run_batch(args):
+    """Runs the searches of a spec file and exits with the combined status code."""
+    from paper_fetcher.batch import BatchRunner, batch_exit_code, read_specs
+
+    if args.specs != "-" and not os.path.exists(args.specs):
+        logging.error(f"No such spec file: {args.specs}")
+        raise SystemExit(2)
+    runner = BatchRunner(
+        workers=args.workers,
+        storage=args.storage,
+        platform_options={"google_scholar": {"fill": not args.no_fill}},
+        enrich=True if args.enrich else None,
+    )
+    counts = {}
+    with (sys.stdin if args.specs == "-" else open(args.specs, 'r', encoding='utf-8')) as lines:
+        specs = read_specs(
+            lines,
+            platform=args.platform,
+            json_file_name=None if args.per_spec else args.json_file_name,
+            extension=os.path.splitext(args.json_file_name)[1] or ".json",
+            max_results=args.max_results,
+            incremental=args.incremental,
+        )
+        for result in runner.run(specs):
+            counts[result.code] = counts.get(result.code, 0) + 1
+            print(json.dumps(result.to_dict(), ensure_ascii=False), flush=True)
+    logging.info(f"Batch finished: {sum(counts.values())} specs, {counts.get(0, 0)} with new papers, "
+                 f"{counts.get(1, 0)} without, {counts.get(2, 0)} failed")
+    raise SystemExit(batch_exit_code(counts))
+
+
+def run_enrich(args):
+    """Enriches every paper of a results file from CrossRef."""
+    from paper_fetcher.enrichment import CrossRefEnricher
+    from paper_fetcher.storage import create_storage
+
+    if not os.path.exists(args.file):
+        logging.error(f"No such results file: {args.file}")
+        raise SystemExit(2)
+    enricher = CrossRefEnricher(batch_size=args.batch_size, mailto=args.mailto)
+    enriched = enricher.enrich_storage(create_storage(args.file))
+    logging.info(f"Enriched {enriched} papers in {args.file}")
+
+
+def run_daemon(args):
+    """Runs the scheduler daemon until interrupted or terminated."""
+    from paper_fetcher.scheduler import FetchScheduler
+
+    try:
+        scheduler = FetchScheduler.from_config(args.config)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.error(f"Invalid scheduler config {args.config}: {e}")
+        raise SystemExit(2)
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+    scheduler.run_forever(run_now=not args.no_initial_run)
+
+
 if __name__ == "__main__":
     main()
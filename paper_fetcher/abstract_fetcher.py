@@ -4,83 +4,236 @@ import os
 import random
 import time
 from abc import ABC, abstractmethod
-from filelock import FileLock
 import sys  # For returning exit codes
 
+from .checkpoint import CheckpointStore, query_key
+from .dedup import DedupIndex
+from .enrichment import CrossRefEnricher
+from .metrics import get_metrics
+from .paper import Paper
+from .storage import create_storage
+from .transport import get_transport
+
 
 class AbstractPaperFetcher(ABC):
     """
     Abstract base class for fetching academic papers. Provides common functionality such as:
     - Scheduling fetch operations
-    - Saving and loading data to and from a JSON file
+    - Saving and loading data through a pluggable storage backend (JSON array or JSON Lines)
+    - Streaming paginated results to storage in batches of ``save_batch_size`` papers
+    - Incremental harvesting from per-query watermarks, resuming unfinished harvests
+    - Optional CrossRef enrichment (ISSN, publisher, citation count) of newly saved papers
+    - Timing of parsing, deduplication, enrichment, saving and whole runs in the shared ``Metrics``
+
+    Fetchers supporting incremental harvesting set ``platform``, fill a ``date`` field on each
+    paper, honor the ``incremental`` flag and the ``since`` (and, if resumable, ``cursor``)
+    search parameters, and keep ``resume_cursor`` pointing at the next page to fetch. The
+    ``incremental`` flag is set on every incremental run, including the first one, which has no
+    ``since`` watermark yet. Fetchers without a resumable cursor must return incremental results
+    oldest first.
+
+    Fetchers raise when a page cannot be fetched instead of ending the results early: the
+    papers fetched so far are saved, an incremental harvest keeps its watermark pending and
+    its cursor, and the run reports an error.
 
     Attributes:
         results_dir (str): Directory where results are stored.
-        json_file_path (str): Path to the JSON file storing paper data.
+        json_file_path (str): Path to the file storing paper data.
         cache_enabled (bool): Whether to cache fetched data in memory.
-        cache (list): Cache for storing paper data if caching is enabled.
+        storage (BaseStorage): Storage backend writing to ``json_file_path``.
+        dedup_index (DedupIndex): On-disk index of stored papers, or None if deduplication is disabled.
+        transport (Transport): HTTP transport used for all requests.
+        save_batch_size (int): Number of streamed papers flushed to storage at once.
+        checkpoints (CheckpointStore): Watermarks and resume cursors of incremental harvests.
+        resume_cursor: Position of the next page of the current harvest, or None.
+        enricher (CrossRefEnricher): Enricher applied to new papers before saving, or None.
     """
 
-    def __init__(self, json_file_name, cache_enabled=True):
+    platform = None
+    # Whether new papers are enriched from CrossRef unless the caller decides otherwise.
+    enrich_by_default = False
+
+    def __init__(self, json_file_name, cache_enabled=True, storage=None, dedup=True, transport=None,
+                 enrich=None):
         self.results_dir = "results"
         os.makedirs(self.results_dir, exist_ok=True)
         self.json_file_path = os.path.join(self.results_dir, json_file_name)
         self.cache_enabled = cache_enabled
-        self.cache = self._load_existing_data() if cache_enabled else []
+        self.storage = create_storage(self.json_file_path, storage, cache_enabled)
+        self.dedup_index = DedupIndex(f"{self.json_file_path}.idx", self.storage) if dedup else None
+        self.transport = transport or get_transport()
+        self.save_batch_size = 500
+        self.checkpoints = CheckpointStore(os.path.join(self.results_dir, "checkpoints.json"))
+        self.resume_cursor = None
+        if enrich is None:
+            enrich = self.enrich_by_default
+        self.enricher = CrossRefEnricher(self.transport) if enrich else None
+
+    @property
+    def cache(self):
+        """In-memory copy of the stored papers, if the storage backend keeps one."""
+        return getattr(self.storage, "cache", [])
 
     def _random_delay(self, min_delay=5, max_delay=10):
         """Pauses execution for a random interval within a specified range."""
-        time.sleep(random.uniform(min_delay, max_delay))
+        delay = random.uniform(min_delay, max_delay)
+        get_metrics().observe("delay_seconds", delay)
+        time.sleep(delay)
+
+    @property
+    def metrics_platform(self):
+        """Platform label of this fetcher's metrics."""
+        return self.platform or type(self).__name__
+
+    def _parse(self, parse, content):
+        """
+        Calls ``parse(content)``, recording its duration and the number of records it returned.
+
+        Args:
+            parse (callable): Function turning a response body into a list of papers.
+            content: Response body.
+
+        Returns:
+            list: The parsed papers.
+        """
+        metrics = get_metrics()
+        with metrics.timer("parse_seconds", platform=self.metrics_platform):
+            papers = parse(content)
+        metrics.inc("records_parsed_total", len(papers), platform=self.metrics_platform)
+        return papers
 
     def _load_existing_data(self):
-        """Loads existing data from the JSON file, if available, ensuring file locking."""
-        if os.path.exists(self.json_file_path):
-            with FileLock(f"{self.json_file_path}.lock"):
-                with open(self.json_file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        return []
+        """Loads existing data from the storage backend."""
+        return self.storage.load()
 
     def _save_to_json(self, data):
         """
-        Saves provided data to a JSON file, ensuring file locking.
+        Saves provided data through the storage backend, ensuring file locking.
 
         Args:
             data (list): List of papers to be saved.
         """
-        if self.cache_enabled:
-            self.cache.extend(data)
-            data_to_write = self.cache
-        else:
-            existing_data = self._load_existing_data()
-            existing_data.extend(data)
-            data_to_write = existing_data
-
-        with FileLock(f"{self.json_file_path}.lock"):
-            with open(self.json_file_path, 'w', encoding='utf-8') as f:
-                json.dump(data_to_write, f, ensure_ascii=False, indent=4)
+        self.storage.save(data)
 
         logging.info(f"Saved {len(data)} papers to {self.json_file_path}")
 
-    def fetch_by_keywords(self, search_params=None, max_results=10):
+    def _save_new_papers(self, papers):
+        """
+        Saves only the papers that are not stored yet, enriching them first if enabled, and
+        records them in the dedup index.
+
+        Processes and threads writing to the same results file may save concurrently: the
+        papers left after a first dedup pass are enriched without holding any lock, then
+        checked against the index again, saved and indexed under the storage lock, so a
+        paper saved by another writer in the meantime is not stored twice.
+
+        Args:
+            papers (list): Fetched papers.
+
+        Returns:
+            int: Number of newly saved papers.
+        """
+        metrics = get_metrics()
+        if self.dedup_index is not None:
+            with metrics.timer("dedup_seconds"):
+                papers = self.dedup_index.filter_new(papers)
+        if not papers:
+            return 0
+        if self.enricher is not None:
+            with metrics.timer("enrich_seconds"):
+                self.enricher.enrich(papers)
+        with self.storage.lock:
+            if self.dedup_index is not None:
+                with metrics.timer("dedup_seconds"):
+                    papers = self.dedup_index.filter_new(papers)
+            if papers:
+                with metrics.timer("save_seconds", backend=type(self.storage).__name__):
+                    self._save_to_json(papers)
+                if self.dedup_index is not None:
+                    with metrics.timer("dedup_seconds"):
+                        self.dedup_index.add(papers)
+        metrics.inc("papers_saved_total", len(papers), platform=self.metrics_platform)
+        return len(papers)
+
+    def fetch_by_keywords(self, search_params=None, max_results=10, incremental=False):
         """
-        Fetches papers based on search parameters and saves them to a file.
+        Fetches papers based on search parameters and saves the ones not stored yet to a file.
 
         Args:
             search_params (dict, optional): Search conditions for fetching papers. Defaults to None.
             max_results (int, optional): Maximum number of papers to fetch. Defaults to 10.
+            incremental (bool, optional): If True, only requests papers newer than the query's
+                watermark and resumes an unfinished harvest from its last page. Defaults to False.
 
         Returns:
-            int: Number of papers fetched and saved.
+            int: Number of new papers saved.
         """
         logging.info(
             "Fetching papers with parameters..." if search_params else "Fetching latest papers..."
         )
 
-        papers = self.fetch_papers(search_params, max_results)
+        key = checkpoint = None
+        if incremental:
+            if self.platform is None:
+                raise ValueError(f"{type(self).__name__} does not support incremental harvesting")
+            key = query_key(self.platform, search_params)
+            checkpoint = self.checkpoints.get(key)
+            search_params = dict(search_params or {}, incremental=True)
+            if checkpoint.get("watermark"):
+                search_params["since"] = checkpoint["watermark"]
+            if checkpoint.get("cursor") is not None:
+                search_params["cursor"] = checkpoint["cursor"]
+                logging.info(f"Resuming harvest from cursor {checkpoint['cursor']}")
+            logging.info(f"Harvesting papers newer than {checkpoint.get('watermark', 'the beginning')}")
 
-        # Save all fetched papers
-        self._save_to_json(papers)
-        return len(papers)
+        # Stream results and save them in batches so memory stays flat for large harvests
+        saved_count = fetched_count = 0
+        newest = checkpoint.get("pending_watermark") if checkpoint else None
+        batch = []
+        self.resume_cursor = None
+        complete = False
+        try:
+            for paper in self.iter_papers(search_params, max_results):
+                batch.append(Paper.coerce(paper))
+                fetched_count += 1
+                if len(batch) >= self.save_batch_size:
+                    saved_count += self._save_new_papers(batch)
+                    if incremental:
+                        newest = self._newest_date(batch, newest)
+                        self.checkpoints.update(key, cursor=self.resume_cursor, pending_watermark=newest)
+                    batch = []
+            complete = True
+        finally:
+            # Papers fetched before a failed page are saved too; the error is then re-raised.
+            if batch:
+                saved_count += self._save_new_papers(batch)
+            if incremental:
+                newest = self._newest_date(batch, newest)
+                # Stopped at max_results: the next run continues from here before moving the watermark.
+                truncated = max_results is not None and fetched_count >= max_results and self.resume_cursor is not None
+                self._update_checkpoint(key, checkpoint, newest, complete and not truncated)
+        if saved_count == 0:
+            logging.info("No new papers to save.")
+        return saved_count
+
+    def _update_checkpoint(self, key, checkpoint, newest, finished):
+        """
+        Records the end of an incremental run: a finished harvest moves the watermark to the
+        newest date fetched, while one stopped at ``max_results`` or by an error keeps it
+        pending and stores the cursor, so the next run continues from there first.
+        """
+        if not finished:
+            cursor = self.resume_cursor if self.resume_cursor is not None else checkpoint.get("cursor")
+            self.checkpoints.update(key, cursor=cursor, pending_watermark=newest)
+        else:
+            watermark = max(filter(None, (checkpoint.get("watermark"), newest)), default=None)
+            self.checkpoints.update(key, watermark=watermark, cursor=None, pending_watermark=None)
+
+    @staticmethod
+    def _newest_date(papers, newest=None):
+        """Returns the latest ``date`` among the papers and ``newest``, or None if there is none."""
+        dates = [paper.date for paper in papers]
+        return max(filter(None, dates + [newest]), default=None)
 
     def fetch_by_keywords_and_return_json(self, search_params=None, max_results=10):
         """
@@ -97,15 +250,57 @@ class AbstractPaperFetcher(ABC):
             "Fetching papers with parameters for JSON output..." if search_params else "Fetching latest papers for JSON output..."
         )
 
-        papers = self.fetch_papers(search_params, max_results)
+        papers = [Paper.coerce(paper) for paper in self.fetch_papers(search_params, max_results)]
 
-        # Save all fetched papers to JSON file
-        self._save_to_json(papers)
+        # Save the papers that are not stored yet to the JSON file
+        self._save_new_papers(papers)
 
         # Return the papers in JSON format
-        return json.dumps(papers, ensure_ascii=False, indent=4)
+        return json.dumps([paper.to_dict() for paper in papers], ensure_ascii=False, indent=4)
     
-    def run(self, search_params=None, max_results=10, output_json=False):
+    def export_json(self, dest_path):
+        """
+        Exports all stored papers as a JSON array file, whatever the storage backend.
+
+        Args:
+            dest_path (str): Path of the JSON file to write.
+
+        Returns:
+            int: Number of exported papers.
+        """
+        return self.storage.export_json(dest_path)
+
+    def execute(self, search_params=None, max_results=10, incremental=False):
+        """
+        Fetches papers and saves the new ones, reporting the outcome as a status code
+        instead of exiting. Used by ``run`` and by callers running many fetches in one
+        process, such as the scheduler daemon.
+
+        Args:
+            search_params (dict, optional): Search conditions for fetching papers. Defaults to None.
+            max_results (int, optional): Maximum number of papers to fetch. Defaults to 10.
+            incremental (bool, optional): If True, only fetches papers newer than the query's watermark.
+
+        Returns:
+            int: 0 if new papers were saved, 1 if none were found, 2 if an error occurred.
+        """
+        metrics = get_metrics()
+        try:
+            with metrics.timer("fetch_seconds", platform=self.metrics_platform):
+                saved_count = self.fetch_by_keywords(search_params, max_results, incremental)
+        except Exception as e:
+            logging.error(f"An error occurred: {e}")
+            metrics.inc("fetch_runs_total", platform=self.metrics_platform, outcome="error")
+            return 2  # Error occurred
+        if saved_count > 0:
+            logging.info("Fetch completed successfully with new papers.")
+            metrics.inc("fetch_runs_total", platform=self.metrics_platform, outcome="new_papers")
+            return 0  # Success, new papers saved
+        logging.info("Fetch completed successfully but no new papers found.")
+        metrics.inc("fetch_runs_total", platform=self.metrics_platform, outcome="no_new_papers")
+        return 1  # No new papers found
+
+    def run(self, search_params=None, max_results=10, output_json=False, incremental=False):
         """
         Main entry point for running the paper fetch operation. 
         Provides success or failure status codes for external monitoring.
@@ -114,33 +309,55 @@ class AbstractPaperFetcher(ABC):
         Args:
             search_params (dict, optional): Search conditions for fetching papers. Defaults to None.
             max_results (int, optional): Maximum number of papers to fetch. Defaults to 10.
-            output_json (bool, optional): If True, returns fetched papers as JSON instead of saving to file.
+            output_json (bool, optional): If True, prints the fetched papers as JSON to stdout.
+            incremental (bool, optional): If True, only fetches papers newer than the query's watermark.
+        """
+        if not output_json:
+            sys.exit(self.execute(search_params, max_results, incremental))
+        code, result_json = self.execute_json(search_params, max_results)
+        if result_json is not None:
+            print(result_json)
+        sys.exit(code)
+
+    def execute_json(self, search_params=None, max_results=10):
+        """
+        Fetches papers and returns them as JSON with a status code, instead of exiting.
+
+        Args:
+            search_params (dict, optional): Search conditions for fetching papers. Defaults to None.
+            max_results (int, optional): Maximum number of papers to fetch. Defaults to 10.
 
         Returns:
-            str (optional): JSON-formatted string containing fetched papers (if output_json is True).
+            tuple: ``(code, result_json)``, where code is 0 if papers were fetched, 1 if none
+            were found and 2 if an error occurred, in which case ``result_json`` is None.
         """
         try:
-            if output_json:
-                result_json = self.fetch_and_return_json(search_params, max_results)
-                fetched_count = len(json.loads(result_json))
-                if fetched_count > 0:
-                    logging.info(f"Fetched and returned {fetched_count} papers in JSON format.")
-                    sys.exit(0)  # Success, JSON returned
-                else:
-                    logging.info("Fetch completed successfully but no papers found.")
-                    sys.exit(1)  # No new papers found
-            else:
-                saved_count = self.fetch_by_keywords(search_params, max_results)
-                if saved_count > 0:
-                    logging.info("Fetch completed successfully with new papers.")
-                    sys.exit(0)  # Success, new papers saved
-                else:
-                    logging.info("Fetch completed successfully but no new papers found.")
-                    sys.exit(1)  # No new papers found
+            result_json = self.fetch_by_keywords_and_return_json(search_params, max_results)
         except Exception as e:
             logging.error(f"An error occurred: {e}")
-            sys.exit(2)  # Error occurred
+            return 2, None  # Error occurred
+        fetched_count = len(json.loads(result_json))
+        if fetched_count > 0:
+            logging.info(f"Fetched and returned {fetched_count} papers in JSON format.")
+            return 0, result_json  # Success, JSON returned
+        logging.info("Fetch completed successfully but no papers found.")
+        return 1, result_json  # No papers found
+
+
+    def iter_papers(self, search_params=None, max_results=10):
+        """
+        Yields papers as they are fetched, page by page. Fetchers backed by a paginated API
+        override this; the default yields the result of ``fetch_papers``.
 
+        Args:
+            search_params (dict, optional): Search conditions for fetching papers. Defaults to None.
+            max_results (int, optional): Maximum number of papers to fetch, or None for all.
+                Defaults to 10.
+
+        Yields:
+            Paper: Fetched papers.
+        """
+        yield from self.fetch_papers(search_params, max_results)
 
     @abstractmethod
     def fetch_papers(self, search_params=None, max_results=10):
@@ -153,6 +370,6 @@ class AbstractPaperFetcher(ABC):
             max_results (int, optional): Maximum number of papers to fetch. Defaults to 10.
 
         Returns:
-            list: List of fetched papers.
+            list: List of fetched papers, as ``Paper`` records (plain dicts are converted).
         """
         pass
@@ -1,32 +1,91 @@
 # paper_fetcher/arxiv_fetcher.py
-import logging
+import io
 from xml.etree import ElementTree as ET
 
-import requests
-
 from .abstract_fetcher import AbstractPaperFetcher
+from .paper import Paper
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+ATOM_ENTRY = ATOM + "entry"
+ATOM_AUTHOR = ATOM + "author"
+ATOM_NAME = ATOM + "name"
+ATOM_TITLE = ATOM + "title"
+ATOM_SUMMARY = ATOM + "summary"
+ATOM_PUBLISHED = ATOM + "published"
+ATOM_ID = ATOM + "id"
+OPENSEARCH_TOTAL = "{http://a9.com/-/spec/opensearch/1.1/}totalResults"
 
 
 class ArXivFetcher(AbstractPaperFetcher):
     """
-    Fetcher for ArXiv academic papers.
+    Fetcher for ArXiv academic papers. Results are paged with ``start`` offsets in pages
+    of ``page_size`` entries. Incremental harvests always sort by ``submittedDate`` (newest
+    first) and stop at the ``since`` watermark.
+
+    The ``date_from`` and ``date_to`` search parameters (``YYYY-MM-DD``, inclusive) restrict
+    the search to a ``submittedDate`` range, which the query planner uses to split searches.
     """
 
-    def __init__(self, json_file_name):
-        super().__init__(json_file_name)
+    platform = "arxiv"
+    API_URL = 'http://export.arxiv.org/api/query'
+    # Deep offsets get slow and the API stops paging well before the end of large result sets.
+    max_results_per_query = 10000
+    earliest_date = "1991-01-01"
+
+    def __init__(self, json_file_name, page_size=100, **kwargs):
+        super().__init__(json_file_name, **kwargs)
+        self.page_size = page_size
 
     def fetch_papers(self, search_params=None, max_results=10):
         """Fetch papers from ArXiv based on search parameters."""
-        query = self._build_query(search_params)
-        response = requests.get('http://export.arxiv.org/api/query', params={
-                                'search_query': f'all:{query}', 'start': 0, 'max_results': max_results})
+        return list(self.iter_papers(search_params, max_results))
+
+    def iter_papers(self, search_params=None, max_results=10):
+        """Yield papers from ArXiv page by page until ``max_results`` or the last page."""
+        query = self._search_query(search_params)
+        incremental = bool((search_params or {}).get('incremental'))
+        since = (search_params or {}).get('since')
+        offset = int((search_params or {}).get('cursor') or 0)
+        fetched = 0
+        while max_results is None or fetched < max_results:
+            page_size = self.page_size if max_results is None else min(self.page_size, max_results - fetched)
+            params = {'search_query': query, 'start': offset, 'max_results': page_size}
+            if incremental:
+                params.update(sortBy='submittedDate', sortOrder='descending')
+            self.resume_cursor = offset
+            response = self.transport.get(self.API_URL, params=params, use_cache=False)
+            response.raise_for_status()
+            papers = self._parse(self._parse_paper_info, response.content)
+            for paper in papers:
+                if since and paper.date and paper.date < since:
+                    # Sorted newest first: everything from here on was already harvested.
+                    self.resume_cursor = None
+                    return
+                yield paper
+            fetched += len(papers)
+            offset += page_size
+            self.resume_cursor = offset
+            if len(papers) < page_size:
+                return
+
+    def count_results(self, search_params=None):
+        """Return the total number of results of a search, without fetching them."""
+        response = self.transport.get(self.API_URL, params={
+            'search_query': self._search_query(search_params), 'start': 0, 'max_results': 0},
+            use_cache=False)
+        response.raise_for_status()
+        return int(ET.fromstring(response.content).findtext(OPENSEARCH_TOTAL) or 0)
 
-        if response.status_code == 200:
-            return self._parse_paper_info(response.content)
-        else:
-            logging.error(
-                f"Error fetching papers from ArXiv: {response.status_code}")
-            return []
+    def _search_query(self, search_params):
+        """Build the ``search_query`` parameter, restricted to the ``date_from``/``date_to`` range."""
+        query = f"all:{self._build_query(search_params)}"
+        date_from = (search_params or {}).get('date_from')
+        date_to = (search_params or {}).get('date_to')
+        if date_from or date_to:
+            start = (date_from or self.earliest_date).replace('-', '')
+            end = (date_to or '9999-12-31').replace('-', '')
+            query += f" AND submittedDate:[{start}0000 TO {end}2359]"
+        return query
 
     def _build_query(self, search_params):
         """Helper to construct the search query string."""
@@ -38,16 +97,29 @@ class ArXivFetcher(AbstractPaperFetcher):
         return f"{keyword} {author} {year}".strip()
 
     def _parse_paper_info(self, xml_content):
-        """Parse XML content from ArXiv and extract paper information."""
-        root = ET.fromstring(xml_content)
+        """
+        Parse XML content from ArXiv and extract paper information. Entries are parsed
+        incrementally and cleared once extracted, reading each entry's fields in one pass.
+        """
         papers = []
-        for entry in root.findall("{http://www.w3.org/2005/Atom}entry"):
-            paper = {
-                "title": entry.find("{http://www.w3.org/2005/Atom}title").text,
-                "author": ', '.join(author.find("{http://www.w3.org/2005/Atom}name").text for author in entry.findall("{http://www.w3.org/2005/Atom}author")),
-                "abstract": entry.find("{http://www.w3.org/2005/Atom}summary").text.strip(),
-                "year": entry.find("{http://www.w3.org/2005/Atom}published").text.split('-')[0],
-                "url": entry.find("{http://www.w3.org/2005/Atom}id").text,
-            }
-            papers.append(paper)
+        for _, elem in ET.iterparse(io.BytesIO(xml_content)):
+            if elem.tag != ATOM_ENTRY:
+                continue
+            authors = []
+            fields = {}
+            for child in elem:
+                if child.tag == ATOM_AUTHOR:
+                    authors.append(child.findtext(ATOM_NAME))
+                else:
+                    fields.setdefault(child.tag, child.text)
+            published = fields[ATOM_PUBLISHED]
+            papers.append(Paper(
+                title=fields[ATOM_TITLE],
+                authors=', '.join(authors),
+                abstract=fields[ATOM_SUMMARY],
+                year=published[:4],
+                date=published[:10],
+                url=fields[ATOM_ID],
+            ))
+            elem.clear()
         return papers
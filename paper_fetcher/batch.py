@@ -0,0 +1,287 @@
+# paper_fetcher/batch.py
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .registry import create_fetcher, parse_platforms
+from .scheduler import DEFAULT_PLATFORM_LIMITS, OUTCOMES, PlatformSlots
+
+# Search parameters a spec may give at its top level instead of under ``search_params``.
+SEARCH_FIELDS = ("keyword", "author", "journal", "year")
+SPEC_FIELDS = ("name", "platform", "search_params", "json_file_name", "max_results", "incremental")
+
+
+class BatchSpec:
+    """
+    One search of a batch, read from a line of a JSONL spec file such as::
+
+        {"name": "ml", "platform": "arxiv", "keyword": "machine learning", "max_results": 50}
+        {"keyword": "cancer", "author": "John Doe", "year": "2020", "incremental": true}
+
+    Attributes:
+        name (str): Name of the spec, used in status lines and per-spec file names.
+        platform (str): Platform selection, see ``parse_platforms``.
+        platforms (list): Platforms the spec queries.
+        search_params (dict): Search conditions.
+        json_file_name (str): Name of the results file.
+        max_results (int): Maximum number of papers to fetch.
+        incremental (bool): Whether only papers newer than the last harvest are fetched.
+    """
+
+    def __init__(self, name, platform, search_params, json_file_name, max_results=10, incremental=False):
+        self.name = name
+        self.platform = platform
+        self.platforms = parse_platforms(platform)
+        self.search_params = search_params
+        self.json_file_name = json_file_name
+        self.max_results = max_results
+        self.incremental = incremental
+
+    @classmethod
+    def from_dict(cls, config, name, platform="pubmed", json_file_name=None, extension=".json",
+                  max_results=10, incremental=False):
+        """
+        Creates a spec from a decoded JSONL line, filling missing fields with the batch defaults.
+
+        Args:
+            config (dict): Spec fields, see ``SPEC_FIELDS`` and ``SEARCH_FIELDS``.
+            name (str): Name used if the spec has none.
+            platform (str, optional): Default platform selection.
+            json_file_name (str, optional): Combined results file, or None to write each spec
+                to ``<name><extension>``.
+            extension (str, optional): Extension of the per-spec results files.
+            max_results (int, optional): Default maximum number of papers.
+            incremental (bool, optional): Default incremental mode.
+
+        Returns:
+            BatchSpec: The spec.
+
+        Raises:
+            ValueError: If the spec is not an object or has unknown fields.
+        """
+        if not isinstance(config, dict):
+            raise ValueError("Spec must be a JSON object")
+        unknown = set(config) - set(SPEC_FIELDS) - set(SEARCH_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown spec fields: {', '.join(sorted(unknown))}")
+        name = str(config.get("name") or name)
+        search_params = dict(config.get("search_params") or {})
+        search_params.update({field: config[field] for field in SEARCH_FIELDS if field in config})
+        file_name = config.get("json_file_name") or json_file_name
+        if not file_name:
+            file_name = re.sub(r'[^\w.-]+', '_', name) + extension
+        return cls(name, config.get("platform") or platform, search_params, file_name,
+                   max_results=config.get("max_results", max_results),
+                   incremental=config.get("incremental", incremental))
+
+
+class BatchResult:
+    """
+    Outcome of one spec of a batch.
+
+    Attributes:
+        name (str): Name of the spec.
+        platform (str): Platform selection of the spec, or None if it could not be read.
+        json_file_name (str): Results file of the spec, or None if it could not be read.
+        code (int): Status code of ``AbstractPaperFetcher.execute``: 0 if new papers were
+            saved, 1 if none were found, 2 if an error occurred.
+        duration (float): Seconds spent running the spec.
+        error (str): Reason the spec could not run, or None.
+    """
+
+    def __init__(self, name, platform, json_file_name, code, duration=0.0, error=None):
+        self.name = name
+        self.platform = platform
+        self.json_file_name = json_file_name
+        self.code = code
+        self.duration = duration
+        self.error = error
+
+    def to_dict(self):
+        result = {
+            "name": self.name,
+            "platform": self.platform,
+            "json_file_name": self.json_file_name,
+            "status": self.code,
+            "outcome": OUTCOMES[self.code],
+            "seconds": round(self.duration, 3),
+        }
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+def read_specs(lines, **defaults):
+    """
+    Parses JSONL spec lines lazily, skipping blank lines and ``#`` comments.
+
+    Args:
+        lines (iterable): Lines of a spec file or of stdin.
+        **defaults: Batch defaults passed to ``BatchSpec.from_dict``.
+
+    Yields:
+        BatchSpec or BatchResult: A spec for each valid line, or an error result (status 2)
+        for a line that cannot be parsed, so the batch goes on with the next line.
+    """
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name = f"spec-{line_number}"
+        try:
+            yield BatchSpec.from_dict(json.loads(line), name, **defaults)
+        except ValueError as e:  # json.JSONDecodeError is a ValueError
+            logging.error(f"Invalid spec on line {line_number}: {e}")
+            yield BatchResult(name, None, None, 2, error=str(e))
+
+
+class BatchRunner:
+    """
+    Runs many searches in one process, reusing fetchers between specs.
+
+    Specs are run by a pool of ``workers`` threads, with the scheduler's per-platform
+    concurrency limits: a spec is only handed to a worker once its platforms have a free
+    slot, so specs waiting for a busy platform do not hold workers while specs of other
+    platforms are ready. At most ``2 * workers`` waiting specs are read ahead, so specs can
+    be streamed from stdin. Fetchers are pooled per platform selection and results file: a spec
+    borrows an idle fetcher or creates one, and returns it when done. A fetcher therefore
+    runs one search at a time, which keeps per-run state such as ``resume_cursor`` private,
+    while its HTTP connections, storage cache and dedup index stay warm. Fetchers writing to
+    the same file share one storage backend. At most ``max_idle_fetchers`` idle fetchers are
+    kept, least recently used first out, so one results file per spec does not keep thousands
+    of files and caches open.
+
+    Attributes:
+        workers (int): Maximum number of specs running at once.
+        platform_limits (dict): Maximum number of specs running at once per platform.
+        max_idle_fetchers (int): Maximum number of idle fetchers kept for later specs.
+        storage (str, optional): Storage backend name of new results files.
+        platform_options (dict): Extra fetcher constructor arguments keyed by platform.
+        fetcher_kwargs (dict): Extra arguments passed to every fetcher constructor.
+    """
+
+    def __init__(self, workers=4, platform_limits=None, max_idle_fetchers=None, storage=None,
+                 platform_options=None, **fetcher_kwargs):
+        self.workers = workers
+        self.platform_limits = dict(DEFAULT_PLATFORM_LIMITS, **(platform_limits or {}))
+        self.max_idle_fetchers = max_idle_fetchers or 2 * workers
+        self.storage = storage
+        self.platform_options = platform_options or {}
+        self.fetcher_kwargs = fetcher_kwargs
+        self._idle = OrderedDict()
+        self._idle_count = 0
+        self._storages = {}
+        self._lock = threading.Lock()
+
+    def _acquire_fetcher(self, spec):
+        """Returns an idle fetcher for the spec's platforms and results file, creating one if needed."""
+        key = (spec.platform, spec.json_file_name)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self._idle_count -= 1
+                return idle.pop()
+            fetcher = create_fetcher(spec.platform, spec.json_file_name, platform_options=self.platform_options,
+                                     storage=self._storages.get(spec.json_file_name, self.storage),
+                                     **self.fetcher_kwargs)
+            self._storages.setdefault(spec.json_file_name, fetcher.storage)
+            return fetcher
+
+    def _release_fetcher(self, spec, fetcher):
+        key = (spec.platform, spec.json_file_name)
+        with self._lock:
+            self._idle.setdefault(key, []).append(fetcher)
+            self._idle.move_to_end(key)
+            self._idle_count += 1
+            while self._idle_count > self.max_idle_fetchers:
+                oldest, fetchers = next(iter(self._idle.items()))
+                fetchers.pop(0)
+                self._idle_count -= 1
+                if not fetchers:
+                    del self._idle[oldest]
+                    # Fetchers still running keep their storage; later ones open a new one.
+                    if all(file_name != oldest[1] for _, file_name in self._idle):
+                        self._storages.pop(oldest[1], None)
+
+    def run_spec(self, spec):
+        """
+        Runs one spec; the platform concurrency limits are enforced by ``run``.
+
+        Returns:
+            BatchResult: Outcome of the spec.
+        """
+        started = time.perf_counter()
+        error = None
+        try:
+            fetcher = self._acquire_fetcher(spec)
+            try:
+                code = fetcher.execute(spec.search_params, spec.max_results, spec.incremental)
+            finally:
+                self._release_fetcher(spec, fetcher)
+        except Exception as e:
+            logging.error(f"Spec {spec.name} failed: {e}")
+            code, error = 2, str(e)
+        return BatchResult(spec.name, spec.platform, spec.json_file_name, code,
+                           time.perf_counter() - started, error)
+
+    def run(self, specs):
+        """
+        Runs specs concurrently and yields their outcomes as they finish.
+
+        Args:
+            specs (iterable): ``BatchSpec`` objects, or ready ``BatchResult`` objects (e.g. for
+                invalid spec lines) which are passed through.
+
+        Yields:
+            BatchResult: Outcome of each spec, in completion order.
+        """
+        specs = iter(specs)
+        slots = PlatformSlots(self.platform_limits)
+        waiting = deque()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as executor:
+            running = {}
+            exhausted = False
+            while True:
+                # Read ahead a bounded number of specs so a huge spec stream is not held in memory.
+                while not exhausted and len(waiting) < 2 * self.workers:
+                    spec = next(specs, None)
+                    if spec is None:
+                        exhausted = True
+                    elif isinstance(spec, BatchResult):
+                        yield spec
+                    else:
+                        waiting.append(spec)
+                # Start the oldest waiting specs whose platforms have free slots.
+                for spec in list(waiting):
+                    if len(running) >= self.workers:
+                        break
+                    if slots.try_acquire(spec.platforms):
+                        waiting.remove(spec)
+                        running[executor.submit(self.run_spec, spec)] = spec
+                if not running:
+                    return
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    slots.release(running.pop(future).platforms)
+                    yield future.result()
+
+
+def batch_exit_code(counts):
+    """
+    Combines the outcomes of a batch into one status code with the semantics of
+    ``AbstractPaperFetcher.run``: 2 if any spec failed, else 0 if any saved new papers, else 1.
+
+    Args:
+        counts (dict): Number of specs per status code.
+
+    Returns:
+        int: The batch status code.
+    """
+    if counts.get(2):
+        return 2
+    return 0 if counts.get(0) else 1
+
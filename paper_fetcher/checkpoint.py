@@ -0,0 +1,75 @@
+# paper_fetcher/checkpoint.py
+import hashlib
+import json
+import os
+
+from filelock import FileLock
+
+# Search parameters set by incremental harvesting itself; they do not identify a query.
+RESERVED_PARAMS = ("since", "cursor", "incremental")
+
+
+def query_key(platform, search_params):
+    """
+    Builds the checkpoint key of a query: the platform plus a hash of the normalized
+    search parameters (lower-cased, whitespace-collapsed, empty values dropped).
+
+    Args:
+        platform (str): Platform name.
+        search_params (dict, optional): Search conditions.
+
+    Returns:
+        str: Key such as ``'pubmed:3f1c...'``.
+    """
+    normalized = {
+        name: ' '.join(str(value).lower().split())
+        for name, value in (search_params or {}).items()
+        if name not in RESERVED_PARAMS and str(value).strip()
+    }
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+    return f"{platform}:{digest[:16]}"
+
+
+class CheckpointStore:
+    """
+    Persists, per platform and normalized query, the newest date harvested so far
+    (``watermark``) and the cursor to resume an unfinished harvest from (``cursor``).
+
+    Checkpoints live in one JSON file updated under a file lock.
+
+    Attributes:
+        file_path (str): Path to the checkpoint file.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = FileLock(f"{file_path}.lock")
+
+    def _read(self):
+        if not os.path.exists(self.file_path):
+            return {}
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def get(self, key):
+        """Returns the checkpoint stored for a query key, or an empty dict."""
+        with self.lock:
+            return self._read().get(key, {})
+
+    def update(self, key, **fields):
+        """
+        Updates fields of a query's checkpoint; fields set to None are removed.
+
+        Args:
+            key (str): Query key, see ``query_key``.
+            **fields: Checkpoint fields such as ``watermark`` or ``cursor``.
+        """
+        with self.lock:
+            checkpoints = self._read()
+            checkpoint = checkpoints.setdefault(key, {})
+            checkpoint.update(fields)
+            checkpoints[key] = {name: value for name, value in checkpoint.items() if value is not None}
+            tmp_path = f"{self.file_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(checkpoints, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.file_path)
@@ -1,33 +1,109 @@
-import requests
-import logging
 from .abstract_fetcher import AbstractPaperFetcher
+from .paper import Paper
 
 
 class CrossRefFetcher(AbstractPaperFetcher):
     """
-    Fetcher for academic papers using the CrossRef API.
+    Fetcher for academic papers using the CrossRef API. Results are paged with deep-paging
+    cursors (``cursor=*``) in pages of up to ``MAX_ROWS`` items.
+
+    Incremental harvests (``incremental`` search parameter) always sort by index date, oldest
+    first, and filter on ``from-index-date`` once there is a watermark. CrossRef cursors expire
+    after a few minutes, so a truncated harvest resumes from its position in index-date order
+    instead: ``'YYYY-MM-DD/n'``, the last index day reached and the number of its items already
+    fetched, which are skipped on the next run. A day holding more than ``max_results`` items is
+    thus harvested over several runs rather than refetched from its start forever.
+
+    The ``date_from`` and ``date_to`` search parameters (``YYYY-MM-DD``, inclusive) restrict
+    the search with ``from-pub-date``/``until-pub-date`` filters, which the query planner
+    uses to split large searches into slices fetched in parallel.
     """
 
-    def __init__(self, json_file_name, cache_enabled=True):
-        super().__init__(json_file_name, cache_enabled)
+    platform = "crossref"
+
+    # CrossRef rejects pages larger than 1000 rows.
+    MAX_ROWS = 1000
+    # Deep-paging cursors have no cap, but a slice this size is paged in a few seconds.
+    max_results_per_query = 10000
+    earliest_date = "1600-01-01"
+
+    def __init__(self, json_file_name, cache_enabled=True, **kwargs):
+        super().__init__(json_file_name, cache_enabled, **kwargs)
         self.base_url = "https://api.crossref.org/works"
 
     def fetch_papers(self, search_params=None, max_results=10):
         """Fetch papers from CrossRef based on search parameters."""
+        return list(self.iter_papers(search_params, max_results))
+
+    def iter_papers(self, search_params=None, max_results=10):
+        """Yield papers from CrossRef page by page, following the deep-paging cursor."""
+        search_params = search_params or {}
+        incremental = bool(search_params.get("incremental"))
         query = self._build_query(search_params)
-        params = {
-            "query": query,
-            "rows": max_results
-        }
-        try:
-            response = requests.get(self.base_url, params=params, timeout=10)
+        # Position of an unfinished incremental harvest: index day and items of it already fetched.
+        day, day_count = search_params.get("since"), 0
+        if incremental and search_params.get("cursor"):
+            day, _, skip = str(search_params["cursor"]).rpartition("/")
+            day_count = int(skip)
+        filters = self._filters(dict(search_params, since=day))
+        skip = day_count
+        cursor = "*"
+        fetched = 0
+        while max_results is None or fetched < max_results:
+            rows = self.MAX_ROWS if max_results is None else min(self.MAX_ROWS, max_results - fetched + skip)
+            params = {
+                "query": query,
+                "rows": rows,
+                "cursor": cursor
+            }
+            if filters:
+                params["filter"] = filters
+            if incremental:
+                params.update({"sort": "indexed", "order": "asc"})
+            # Cursors expire after a few minutes; a cached page would replay a dead one.
+            response = self.transport.get(self.base_url, params=params, use_cache=False)
             response.raise_for_status()
-            data = response.json().get("message", {}).get("items", [])
-            papers = self._parse_papers(data)
-            return papers
-        except Exception as e:
-            logging.error(f"Error fetching papers from CrossRef: {e}")
-            return []
+            message = response.json().get("message", {})
+            papers = self._parse(self._parse_papers, message.get("items", []))
+            for paper in papers:
+                if skip:
+                    # Fetched by the previous run of this harvest.
+                    skip -= 1
+                    continue
+                if incremental:
+                    if paper.date != day:
+                        day, day_count = paper.date, 0
+                    day_count += 1
+                    self.resume_cursor = f"{day}/{day_count}"
+                yield paper
+                fetched += 1
+                if max_results is not None and fetched >= max_results:
+                    return
+            cursor = message.get("next-cursor")
+            if len(papers) < rows or not cursor:
+                return
+
+    def count_results(self, search_params=None):
+        """Return the total number of results of a search, without fetching them."""
+        params = {"query": self._build_query(search_params), "rows": 0}
+        filters = self._filters(search_params)
+        if filters:
+            params["filter"] = filters
+        response = self.transport.get(self.base_url, params=params, use_cache=False)
+        response.raise_for_status()
+        return int(response.json().get("message", {}).get("total-results", 0))
+
+    def _filters(self, search_params):
+        """Build the ``filter`` parameter from the ``since`` watermark and the ``date_from``/``date_to`` range."""
+        search_params = search_params or {}
+        filters = []
+        if search_params.get("since"):
+            filters.append(f"from-index-date:{search_params['since']}")
+        if search_params.get("date_from"):
+            filters.append(f"from-pub-date:{search_params['date_from']}")
+        if search_params.get("date_to"):
+            filters.append(f"until-pub-date:{search_params['date_to']}")
+        return ','.join(filters)
 
     def _build_query(self, search_params):
         """Construct the query string for CrossRef."""
@@ -38,20 +114,22 @@ class CrossRefFetcher(AbstractPaperFetcher):
         return f"{keyword} {author}".strip()
 
     def _parse_papers(self, data):
-        """Parse CrossRef response data into a list of paper dictionaries."""
+        """Parse CrossRef response data into a list of papers."""
         papers = []
         for item in data:
-            paper = {
-                "title": item.get("title", ["N/A"])[0],
-                "author": ', '.join(
-                    author.get("given", "N/A") + " " + author.get("family", "N/A")
+            date_parts = item.get("created", {}).get("date-parts") or [[None]]
+            paper = Paper(
+                title=next(iter(item.get("title") or []), None),
+                authors=', '.join(
+                    ' '.join(filter(None, (author.get("given"), author.get("family"))))
                     for author in item.get("author", [])
-                ) if "author" in item else "N/A",
-                "year": item.get("created", {}).get("date-parts", [[0]])[0][0],
-                "doi": item.get("DOI", "N/A"),
-                "journal": item.get("container-title", ["N/A"])[0],
-                "issn": ', '.join(item.get("ISSN", [])),
-                "url": item.get("URL", "N/A"),
-            }
+                ),
+                year=date_parts[0][0] if date_parts[0] else None,
+                date=item.get("indexed", {}).get("date-time", "")[:10],
+                doi=item.get("DOI"),
+                journal=next(iter(item.get("container-title") or []), None),
+                issn=', '.join(item.get("ISSN", [])),
+                url=item.get("URL"),
+            )
             papers.append(paper)
         return papers
@@ -0,0 +1,298 @@
+# paper_fetcher/dedup.py
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import unicodedata
+
+PLACEHOLDER_VALUES = {"", "n/a", "none", "null"}
+
+DOI_PREFIX_RE = re.compile(r'^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)', re.IGNORECASE)
+ARXIV_URL_RE = re.compile(r'arxiv\.org/(?:abs|pdf)/(.+?)(?:v\d+)?(?:\.pdf)?$', re.IGNORECASE)
+
+
+def clean_value(value):
+    """Returns the stripped string form of a field, or None for missing and placeholder values."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return None if value.lower() in PLACEHOLDER_VALUES else value
+
+
+def normalize_doi(doi):
+    """Normalizes a DOI to its lower-case bare form (no resolver prefix)."""
+    doi = clean_value(doi)
+    return DOI_PREFIX_RE.sub('', doi).lower() if doi else None
+
+
+def normalize_title(title):
+    """Normalizes a title to lower-case alphanumeric words separated by single spaces."""
+    title = clean_value(title)
+    if not title:
+        return None
+    title = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(re.findall(r'[a-z0-9]+', title.lower())) or None
+
+
+def paper_ids(paper):
+    """
+    Extracts the normalized identifiers of a paper.
+
+    Args:
+        paper (Paper or dict): Paper record.
+
+    Returns:
+        tuple: ``(doi, arxiv_id, pmid)``, each None when the record does not carry it.
+    """
+    doi = normalize_doi(paper.get("doi"))
+
+    url = clean_value(paper.get("url")) or ''
+    arxiv_id = clean_value(paper.get("arxiv_id"))
+    if not arxiv_id:
+        match = ARXIV_URL_RE.search(url)
+        arxiv_id = match.group(1) if match else None
+
+    # PubMed records carry the PMID in their ``url`` field.
+    pmid = clean_value(paper.get("pmid")) or (url if url.isdigit() else None)
+    return doi, arxiv_id.lower() if arxiv_id else None, pmid
+
+
+def title_key(paper):
+    """Returns a hash of the normalized title and publication year of a paper, or None without a title."""
+    title = normalize_title(paper.get("title"))
+    if not title:
+        return None
+    year = clean_value(paper.get("year")) or ''
+    return hashlib.sha1(f"{title}|{year}".encode('utf-8')).hexdigest()[:20]
+
+
+def paper_identity(paper):
+    """
+    Extracts what identifies a paper for deduplication.
+
+    Args:
+        paper (Paper or dict): Paper record.
+
+    Returns:
+        tuple: ``(doi, arxiv_id, pmid, title_key)``; the first three are the strong identifiers.
+    """
+    return paper_ids(paper) + (title_key(paper),)
+
+
+def same_paper(identity, other):
+    """
+    Decides whether two identities, see ``paper_identity``, describe the same paper.
+
+    Strong identifiers take priority: two records that both carry some are the same paper
+    when they share one and no identifier of the same kind differs, e.g. two editorials with
+    different DOIs are never merged whatever their titles. The title and year only decide
+    when a record carries no strong identifier.
+    """
+    strong, other_strong = identity[:3], other[:3]
+    if any(strong) and any(other_strong):
+        pairs = [(a, b) for a, b in zip(strong, other_strong) if a and b]
+        return bool(pairs) and all(a == b for a, b in pairs)
+    return identity[3] is not None and identity[3] == other[3]
+
+
+def paper_keys(paper):
+    """
+    Computes the lookup keys of a paper, most reliable first: the normalized DOI, the arXiv id
+    and PMID, or a hash of the normalized title and year if the paper has none of these.
+
+    Records sharing a key are candidates for being the same paper; ``same_paper`` decides.
+
+    Args:
+        paper (Paper or dict): Paper record.
+
+    Returns:
+        list: Keys such as ``'doi:10.1/x'``, ``'arxiv:2101.00001'`` or ``'title:<hash>'``.
+    """
+    doi, arxiv_id, pmid, title = paper_identity(paper)
+    keys = [f"{kind}:{value}" for kind, value in (("doi", doi), ("arxiv", arxiv_id), ("pmid", pmid)) if value]
+    return keys or ([f"title:{title}"] if title else [])
+
+
+class IdentityIndex:
+    """
+    In-memory index of records by identity, matching them with ``same_paper``.
+
+    Every record is indexed by its strong identifiers and its title key, since a record
+    without strong identifiers matches any record of the same title and year.
+    """
+
+    def __init__(self):
+        self._by_key = {}
+
+    @staticmethod
+    def _keys(identity):
+        doi, arxiv_id, pmid, title = identity
+        return [key for key in (("doi", doi), ("arxiv", arxiv_id), ("pmid", pmid), ("title", title)) if key[1]]
+
+    def find(self, identity):
+        """Returns the value of an indexed record that is the same paper as ``identity``, or None."""
+        for key in self._keys(identity):
+            for other, value in self._by_key.get(key, ()):
+                if same_paper(identity, other):
+                    return value
+        return None
+
+    def add(self, identity, value=True):
+        """Indexes a record's identity with an associated value."""
+        for key in self._keys(identity):
+            self._by_key.setdefault(key, []).append((identity, value))
+
+
+class DedupIndex:
+    """
+    On-disk index of the identities of stored papers, backed by SQLite so membership checks
+    do not require loading the stored corpus. Papers are matched with ``same_paper``.
+
+    The index records the ``stamp`` of the storage it was last synchronized with. When the
+    results file no longer matches it, e.g. because it was deleted, replaced or edited by
+    another tool, the index is rebuilt from the storage before it is used, so a stale index
+    never suppresses saves.
+
+    Attributes:
+        index_path (str): Path to the SQLite index file.
+        storage (BaseStorage, optional): Storage the index describes, used to (re)build it.
+    """
+
+    # Bumped whenever the layout changes; an index of another version is rebuilt.
+    VERSION = "2"
+    # Maximum number of values bound in one query.
+    QUERY_CHUNK = 500
+
+    def __init__(self, index_path, storage=None):
+        self.index_path = index_path
+        self.storage = storage
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        """Opens the index on first use, creating its tables."""
+        if self._conn is None:
+            # Writers in other processes may hold the database briefly; wait for them.
+            self._conn = sqlite3.connect(self.index_path, timeout=30, check_same_thread=False)
+            with self._conn:
+                self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+                version = self._conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+                if version is None or version[0] != self.VERSION:
+                    self._conn.execute("DROP TABLE IF EXISTS seen")
+                    self._conn.execute("DROP TABLE IF EXISTS records")
+                    self._conn.execute("DELETE FROM meta")
+                    self._conn.execute("INSERT INTO meta VALUES ('version', ?)", (self.VERSION,))
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS records ("
+                    " doi TEXT, arxiv_id TEXT, pmid TEXT, title TEXT, strong INTEGER NOT NULL)")
+                for column in ("doi", "arxiv_id", "pmid", "title"):
+                    self._conn.execute(f"CREATE INDEX IF NOT EXISTS records_{column} ON records ({column})")
+        return self._conn
+
+    def _recorded_stamp(self):
+        row = self._connection().execute("SELECT value FROM meta WHERE name = 'stamp'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _record_stamp(self, stamp):
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('stamp', ?)",
+                           (json.dumps(list(stamp) if stamp is not None else None),))
+
+    def _validate(self):
+        """Rebuilds the index from the storage if the results file changed since it was last synchronized."""
+        if self.storage is None:
+            return
+        current = self.storage.stamp()
+        current = list(current) if current is not None else None
+        with self._lock:
+            if self._recorded_stamp() == current:
+                return
+        # Writers save and index under the storage lock, which is always taken before the
+        # index lock, so a mismatch seen under it is a genuine change of the file.
+        with self.storage.lock:
+            current = self.storage.stamp()
+            with self._lock:
+                if self._recorded_stamp() == (list(current) if current is not None else None):
+                    return
+                logging.info(f"Rebuilding dedup index {self.index_path} from {self.storage.file_path}")
+                with self._conn:
+                    self._conn.execute("DELETE FROM records")
+                    if current is not None:
+                        self._insert(map(paper_identity, self.storage.iter_records()))
+                    self._record_stamp(current)
+
+    def _insert(self, identities):
+        self._conn.executemany(
+            "INSERT INTO records (doi, arxiv_id, pmid, title, strong) VALUES (?, ?, ?, ?, ?)",
+            (identity + (int(any(identity[:3])),) for identity in identities))
+
+    def _candidates(self, identities):
+        """
+        Loads the indexed records that may be the same paper as any of the identities into an
+        ``IdentityIndex``, with one query per identifier column; the index lock must be held.
+        """
+        conn = self._connection()
+        candidates = IdentityIndex()
+        weak_titles = {identity[3] for identity in identities if identity[3] and not any(identity[:3])}
+        strong_titles = {identity[3] for identity in identities if identity[3] and any(identity[:3])}
+        lookups = [(f"{column} IN", {identity[position] for identity in identities if identity[position]})
+                   for position, column in enumerate(("doi", "arxiv_id", "pmid"))]
+        # Records without strong identifiers match any record of the same title; records with
+        # some only match those without.
+        lookups += [("title IN", weak_titles), ("strong = 0 AND title IN", strong_titles - weak_titles)]
+        for condition, values in lookups:
+            values = list(values)
+            for start in range(0, len(values), self.QUERY_CHUNK):
+                chunk = values[start:start + self.QUERY_CHUNK]
+                rows = conn.execute(f"SELECT doi, arxiv_id, pmid, title FROM records WHERE {condition} "
+                                    f"({','.join('?' * len(chunk))})", chunk)
+                for row in rows:
+                    candidates.add(tuple(row))
+        return candidates
+
+    def __contains__(self, paper):
+        self._validate()
+        identity = paper_identity(paper)
+        with self._lock:
+            return self._candidates([identity]).find(identity) is not None
+
+    def filter_new(self, papers):
+        """
+        Filters out papers that are already indexed or repeated within the batch.
+
+        Args:
+            papers (list): Candidate papers.
+
+        Returns:
+            list: Papers not seen before, in their original order.
+        """
+        self._validate()
+        identities = [paper_identity(paper) for paper in papers]
+        with self._lock:
+            stored = self._candidates(identities)
+        new_papers = []
+        batch = IdentityIndex()
+        for paper, identity in zip(papers, identities):
+            if batch.find(identity) or stored.find(identity):
+                continue
+            batch.add(identity)
+            new_papers.append(paper)
+        return new_papers
+
+    def add(self, papers):
+        """
+        Records the identities of papers just saved, and the storage stamp they were saved at.
+        Callers hold the storage lock, so no other writer changed the file in between.
+        """
+        with self._lock:
+            with self._connection():
+                self._insert(map(paper_identity, papers))
+                if self.storage is not None:
+                    self._record_stamp(self.storage.stamp())
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
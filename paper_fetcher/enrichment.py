@@ -0,0 +1,188 @@
+# paper_fetcher/enrichment.py
+import json
+import logging
+from itertools import islice
+
+from .dedup import clean_value, normalize_doi
+from .transport import get_transport
+
+# Fields requested from CrossRef, and the paper fields they fill.
+CROSSREF_FIELDS = ("DOI", "ISSN", "publisher", "is-referenced-by-count", "container-title")
+ENRICHED_FIELDS = ("issn", "publisher", "journal", "citation_count")
+
+
+class CrossRefEnricher:
+    """
+    Fills missing ISSN, publisher, journal and citation count fields of papers from CrossRef.
+
+    Papers are enriched in place, whatever platform they come from. Placeholder DOIs are
+    skipped, each distinct DOI of a batch is looked up once, and up to ``batch_size`` DOIs
+    are resolved per request with a ``filter=doi:a,doi:b`` query. The queries of a batch run
+    concurrently through the transport, within the CrossRef rate limit.
+
+    With a response cache on the transport, works are cached one DOI at a time under the key
+    of their ``/works/<doi>`` lookup, so repeated enrichment across runs only queries the DOIs
+    it has not seen before, whichever DOIs they were batched with.
+
+    Attributes:
+        transport (Transport): HTTP transport used for the CrossRef requests.
+        batch_size (int): Maximum number of DOIs resolved per request.
+        mailto (str, optional): Contact address sent to CrossRef to use its polite pool.
+    """
+
+    WORKS_URL = "https://api.crossref.org/works"
+
+    def __init__(self, transport=None, batch_size=50, mailto=None):
+        self.transport = transport or get_transport()
+        self.batch_size = batch_size
+        self.mailto = mailto
+
+    def enrich(self, papers):
+        """
+        Enriches papers in place with the CrossRef metadata of their DOI.
+
+        Args:
+            papers (list): Papers to enrich; fields already set are kept.
+
+        Returns:
+            int: Number of papers for which CrossRef returned metadata.
+        """
+        papers_by_doi = {}
+        for paper in papers:
+            doi = normalize_doi(paper.get("doi"))
+            if doi:
+                papers_by_doi.setdefault(doi, []).append(paper)
+        if not papers_by_doi:
+            return 0
+
+        enriched = 0
+        for doi, item in self._lookup(papers_by_doi).items():
+            for paper in papers_by_doi.get(doi, []):
+                self._fill(paper, item)
+                enriched += 1
+        logging.info(f"Enriched {enriched} of {len(papers)} papers from CrossRef")
+        return enriched
+
+    def _lookup(self, dois):
+        """Returns the CrossRef works of distinct normalized DOIs, resolving ``batch_size`` per request concurrently."""
+        works = self._lookup_cached_works(dois)
+        missing = iter([doi for doi in dois if doi not in works])
+        chunks = list(iter(lambda: list(islice(missing, self.batch_size)), []))
+        for items in self.transport.map(self._fetch_works, chunks):
+            works.update(items)
+        return works
+
+    def _work_cache_key(self, doi):
+        """Cache key of a single work: that of its ``/works/<doi>`` request."""
+        return self.transport.cache.make_key('GET', f"{self.WORKS_URL}/{doi}")
+
+    def _lookup_cached_works(self, dois):
+        """Return the fresh cached works among ``dois``, keyed by normalized DOI."""
+        cache = self.transport.cache
+        if cache is None:
+            return {}
+        works = {}
+        for doi in dois:
+            entry = cache.lookup(self._work_cache_key(doi))
+            if entry is not None and cache.is_fresh(entry):
+                cache.record("hits")
+                works[doi] = json.loads(entry["body"]).get("message", {})
+            else:
+                cache.record("misses")
+        return works
+
+    def _cache_works(self, works):
+        """Cache fetched works one DOI at a time, as the body of their ``/works/<doi>`` lookup."""
+        cache = self.transport.cache
+        if cache is None:
+            return
+        for doi, item in works.items():
+            url = f"{self.WORKS_URL}/{doi}"
+            # Only the fields in CROSSREF_FIELDS are stored, which is all the enricher reads.
+            cache.store(self._work_cache_key(doi), url, 200, {"Content-Type": "application/json"},
+                        json.dumps({"status": "ok", "message": item}).encode('utf-8'))
+
+    def _fetch_works(self, dois):
+        """Returns the CrossRef works of a list of DOIs, keyed by normalized DOI."""
+        # Commas separate filters, so a DOI containing one has to be looked up on its own.
+        listed = [doi for doi in dois if ',' not in doi]
+        works = {}
+        try:
+            if listed:
+                params = {
+                    "filter": ','.join(f"doi:{doi}" for doi in listed),
+                    "rows": len(listed),
+                    "select": ','.join(CROSSREF_FIELDS),
+                }
+                listed_works = {normalize_doi(item.get("DOI")): item
+                                for item in self._get(self.WORKS_URL, params).get("items", [])}
+                self._cache_works(listed_works)
+                works.update(listed_works)
+            for doi in dois:
+                if ',' in doi:
+                    works[doi] = self._get(f"{self.WORKS_URL}/{doi}")
+        except Exception as e:
+            logging.warning(f"CrossRef enrichment failed for {len(dois)} DOIs: {e}")
+        return works
+
+    def _get(self, url, params=None):
+        params = dict(params or {})
+        if self.mailto:
+            params["mailto"] = self.mailto
+        response = self.transport.get(url, params=params)
+        response.raise_for_status()
+        return response.json().get("message", {})
+
+    @staticmethod
+    def _fill(paper, item):
+        """Fills the missing fields of a paper from a CrossRef work."""
+        values = {
+            "issn": ', '.join(item.get("ISSN", [])),
+            "publisher": item.get("publisher"),
+            "journal": next(iter(item.get("container-title", [])), None),
+            "citation_count": item.get("is-referenced-by-count"),
+        }
+        for field, value in values.items():
+            if clean_value(paper.get(field)) is None and clean_value(value) is not None:
+                paper[field] = value
+
+    def enrich_storage(self, storage, chunk_size=1000):
+        """
+        Enriches every paper of a storage backend and rewrites it.
+
+        CrossRef is queried for the DOIs of a snapshot of the stored papers without holding
+        the storage lock. The lock is only held afterwards, to fill the fetched metadata into
+        the records stored by then and replace the file, so concurrent writers never wait for
+        the network. Only the CrossRef fields used for filling are kept in memory per DOI.
+
+        Args:
+            storage (BaseStorage): Storage holding the papers.
+            chunk_size (int, optional): Number of DOIs looked up at once. Defaults to 1000.
+
+        Returns:
+            int: Number of papers for which CrossRef returned metadata.
+        """
+        dois = dict.fromkeys(
+            normalize_doi(record.get("doi")) for record in storage.iter_records()
+            if any(clean_value(record.get(field)) is None for field in ENRICHED_FIELDS))
+        dois.pop(None, None)
+        dois = iter(dois)
+        works = {}
+        for chunk in iter(lambda: list(islice(dois, chunk_size)), []):
+            works.update(self._lookup(chunk))
+
+        enriched = 0
+
+        def enriched_records():
+            nonlocal enriched
+            for record in storage.iter_records():
+                item = works.get(normalize_doi(record.get("doi")))
+                if item is not None:
+                    self._fill(record, item)
+                    enriched += 1
+                yield record
+
+        with storage.lock:
+            storage.rewrite(enriched_records())
+        logging.info(f"Enriched {enriched} papers from CrossRef")
+        return enriched
@@ -1,48 +1,94 @@
 from scholarly import scholarly, ProxyGenerator
 import logging
-import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from .abstract_fetcher import AbstractPaperFetcher
+from .metrics import get_metrics
+from .paper import Paper
+from .rate_limit import retry_call
+
+SCHOLAR_HOST = "scholar.google.com"
 
 
 class GoogleScholarFetcher(AbstractPaperFetcher):
     """
     Fetcher for Google Scholar academic papers.
+
+    Scholar requests made through ``scholarly`` are paced by the shared rate limiter, and each
+    search page or detail request is retried on its own with jittered exponential backoff.
+
+    Search results are consumed lazily and only up to ``max_results``. With ``fill`` enabled,
+    the detail page of each kept result is fetched on a pool of ``fill_workers`` threads;
+    otherwise only the metadata of the search page is returned.
+
+    New papers are enriched from CrossRef before saving unless ``enrich=False`` is passed.
     """
 
-    def __init__(self, json_file_name):
-        super().__init__(json_file_name)
+    enrich_by_default = True
+    metrics_platform = "google_scholar"
+
+    def __init__(self, json_file_name, fill=True, fill_workers=4, **kwargs):
+        super().__init__(json_file_name, **kwargs)
         self.max_retries = 5
         self.base_timeout = 10
+        self.fill = fill
+        self.fill_workers = fill_workers
 
     def fetch_papers(self, search_params=None, max_results=10):
         """Fetch papers from Google Scholar based on search parameters."""
+        return list(self.iter_papers(search_params, max_results))
+
+    def iter_papers(self, search_params=None, max_results=10):
+        """Yield papers from Google Scholar, filling them a batch of workers at a time."""
         query = self._build_query(search_params)
         if not query:
             logging.warning("Invalid query, returning empty result.")
-            return []
+            return
 
-        retry_count = 0
-        timeout = self.base_timeout
+        try:
+            search_query = self._retry(scholarly.search_pubs, query)
+        except Exception as e:
+            logging.error(f"Giving up on Google Scholar search after {self.max_retries} retries: {e}")
+            raise
+        results = self._iter_results(search_query, max_results)
+        with ThreadPoolExecutor(max_workers=self.fill_workers) as executor:
+            while True:
+                batch = list(islice(results, self.fill_workers))
+                if not batch:
+                    return
+                if self.fill:
+                    yield from executor.map(self._parse_paper_info, batch)
+                else:
+                    yield from map(self._parse_paper_info, batch)
 
-        while retry_count < self.max_retries:
+    def _iter_results(self, search_query, max_results):
+        """Yield at most ``max_results`` search results, retrying the fetch of a failed result page."""
+        count = 0
+        while max_results is None or count < max_results:
             try:
-                search_query = scholarly.search_pubs(query)
-                papers = [self._parse_paper_info(paper) for paper in search_query][:max_results]
-                enriched_papers = [self._enrich_with_crossref(paper) for paper in papers]
-                return enriched_papers
+                result = self._next_result(search_query)
+            except StopIteration:
+                return
             except Exception as e:
-                retry_count += 1
-                logging.error(f"Attempt {retry_count} failed: {e}")
-                if retry_count < self.max_retries:
-                    logging.info(f"Retrying in {timeout} seconds...")
-                    time.sleep(timeout)
-                    timeout *= 2
-                else:
-                    logging.error(f"Giving up after {retry_count} attempts.")
-                    break
+                logging.error(f"Giving up on Google Scholar results after {count} papers: {e}")
+                raise
+            count += 1
+            yield result
 
-        return []
+    def _next_result(self, search_query):
+        """
+        Return the next search result. ``scholarly`` loads a page of results at once, so only a
+        call past the rows of the loaded page requests Scholar and takes a rate-limit token.
+        """
+        rows = getattr(search_query, "_rows", None)
+        if rows is not None and getattr(search_query, "_pos", 0) < len(rows):
+            return next(search_query)
+        return self._retry(next, search_query)
+
+    def _retry(self, func, *args):
+        """Call a ``scholarly`` function under the Scholar rate limit, retrying it with backoff."""
+        return retry_call(func, *args, host=SCHOLAR_HOST, max_retries=self.max_retries,
+                          base_delay=self.base_timeout, rate_limiter=self.transport.rate_limiter)
 
     def _build_query(self, search_params):
         """Helper to construct the search query string."""
@@ -52,37 +98,31 @@ class GoogleScholarFetcher(AbstractPaperFetcher):
         return f'{keyword} {author} {year}'.strip()
 
     def _parse_paper_info(self, paper):
-        """Parse paper information from Google Scholar result."""
-        scholarly.fill(paper)
-        bib = paper.get('bib', {})
-        return {
-            "title": bib.get('title', 'N/A'),
-            "author": ', '.join(bib.get('author', [])),
-            "abstract": bib.get('abstract', 'N/A'),
-            "year": bib.get('pub_year', 'N/A'),
-            "journal": bib.get('venue', 'N/A'),
-            "citation_count": paper.get('num_citations', 'N/A'),
-            "doi": paper.get('doi', 'N/A'),
-            "url": paper.get('eprint_url', 'N/A'),
-            "issn": "N/A"  # Placeholder for ISSN
-        }
-
-    def _enrich_with_crossref(self, paper):
-        """Enrich paper information with CrossRef data to fetch ISSN."""
-        if not paper.get("doi"):
-            logging.info("No DOI available, skipping CrossRef enrichment.")
-            return paper
-
-        crossref_url = f"https://api.crossref.org/works/{paper['doi']}"
-        try:
-            response = requests.get(crossref_url, timeout=10)
-            if response.status_code == 200:
-                data = response.json().get("message", {})
-                issn_list = data.get("ISSN", [])
-                paper["issn"] = ', '.join(issn_list) if issn_list else "N/A"
-            else:
-                logging.warning(f"CrossRef query failed for DOI {paper['doi']} with status {response.status_code}.")
-        except Exception as e:
-            logging.error(f"Error querying CrossRef for DOI {paper['doi']}: {e}")
-
+        """Parse paper information from Google Scholar result, filling in its detail page if enabled."""
+        if self.fill:
+            try:
+                paper = self._retry(scholarly.fill, paper)
+            except Exception as e:
+                logging.warning(f"Could not fill Google Scholar result, keeping search metadata: {e}")
+        metrics = get_metrics()
+        with metrics.timer("parse_seconds", platform=self.metrics_platform):
+            paper = self._build_paper(paper)
+        metrics.inc("records_parsed_total", platform=self.metrics_platform)
         return paper
+
+    @staticmethod
+    def _build_paper(paper):
+        """Convert a ``scholarly`` publication dict to a paper."""
+        bib = paper.get('bib', {})
+        authors = bib.get('author', [])
+        return Paper(
+            title=bib.get('title'),
+            # Search-page results give authors as a list, filled ones as an 'A and B' string.
+            authors=authors if isinstance(authors, str) else ', '.join(authors),
+            abstract=bib.get('abstract'),
+            year=bib.get('pub_year'),
+            journal=bib.get('venue'),
+            citation_count=paper.get('num_citations'),
+            doi=paper.get('doi'),
+            url=paper.get('eprint_url'),
+        )
@@ -0,0 +1,289 @@
+# paper_fetcher/metrics.py
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds of the histogram buckets; the last bucket is unbounded.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prefix of the metric names in the Prometheus export.
+PROMETHEUS_PREFIX = "paper_fetcher_"
+
+
+class Histogram:
+    """
+    Distribution of observed values in fixed buckets, with their count, sum, minimum and maximum.
+
+    Attributes:
+        buckets (tuple): Upper bounds of the buckets.
+        counts (list): Number of observations per bucket, the last one counting values above every bound.
+        count (int): Number of observations.
+        sum (float): Sum of the observed values.
+        min (float): Smallest observed value, or None.
+        max (float): Largest observed value, or None.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Estimates a quantile by linear interpolation within its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                value = lower + (upper - lower) * (rank - seen) / count
+                return min(max(value, self.min), self.max)
+            seen += count
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _prometheus_labels(labels, **extra):
+    items = list(labels) + sorted(extra.items())
+    if not items:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in items)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + "}"
+
+
+class Metrics:
+    """
+    Thread-safe registry of the counters and timing histograms recorded during a run.
+
+    Series are identified by a metric name and keyword labels, e.g.
+    ``metrics.inc("http_requests_total", host="api.crossref.org", status=200)``. Durations are
+    recorded in seconds with ``observe`` or the ``timer`` context manager.
+
+    The metrics recorded by the package are:
+
+    - ``http_request_seconds{host}``: latency of each request attempt, including Scholar
+      requests made through ``scholarly``.
+    - ``http_requests_total{host,status}``, ``http_response_bytes_total{host}`` (decoded bodies).
+    - ``http_retries_total{host,reason}`` and ``http_throttled_total{host}`` (429/503 answers).
+    - ``http_cache_total{host,result}``: response cache hits, revalidations and misses.
+    - ``rate_limit_wait_seconds{host}`` and ``delay_seconds``: time spent sleeping before requests.
+    - ``parse_seconds{platform}`` and ``records_parsed_total{platform}``: response parsing.
+    - ``dedup_seconds``, ``enrich_seconds`` and ``save_seconds{backend}`` per saved batch, and
+      ``papers_saved_total{platform}``.
+    - ``fetch_seconds{platform}`` and ``fetch_runs_total{platform,outcome}`` per fetch run.
+
+    Attributes:
+        started (float): Time the registry was created or last reset.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """Adds ``value`` to a counter."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Records a value, usually a duration in seconds, in a histogram."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Records the duration of the ``with`` block in a histogram, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter(self, name, **labels):
+        """Returns the value of a counter, or the sum over its series if ``labels`` is empty."""
+        with self._lock:
+            if labels:
+                return self._counters.get((name, _label_key(labels)), 0)
+            return sum(value for (series, _), value in self._counters.items() if series == name)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started = time.time()
+
+    def report(self):
+        """
+        Returns every series as a JSON-serializable dict, with a per-host and per-platform summary.
+
+        Returns:
+            dict: ``started``, ``duration``, ``counters`` and ``histograms`` (each a list of
+            series per metric name) and ``summary``.
+        """
+        with self._lock:
+            counters = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters.setdefault(name, []).append({"labels": dict(labels), "value": value})
+            histograms = {}
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                histograms.setdefault(name, []).append(dict(labels=dict(labels), **histogram.to_dict()))
+        return {
+            "started": self.started,
+            "duration": time.time() - self.started,
+            "counters": counters,
+            "histograms": histograms,
+            "summary": self._summary(counters, histograms),
+        }
+
+    @staticmethod
+    def _summary(counters, histograms):
+        """Aggregates the series into per-host request and per-platform parsing statistics."""
+        def by_label(series, label):
+            totals = {}
+            for entry in series:
+                key = entry["labels"].get(label)
+                if key is not None:
+                    totals[key] = totals.get(key, 0) + entry.get("value", entry.get("count", 0))
+            return totals
+
+        hosts = {}
+        for entry in histograms.get("http_request_seconds", []):
+            hosts[entry["labels"]["host"]] = {
+                "requests": entry["count"], "mean_seconds": entry["mean"], "p90_seconds": entry["p90"]}
+        for metric, field in (("http_response_bytes_total", "bytes"), ("http_retries_total", "retries"),
+                              ("http_throttled_total", "throttled")):
+            for host, value in by_label(counters.get(metric, []), "host").items():
+                hosts.setdefault(host, {})[field] = value
+        for entry in histograms.get("rate_limit_wait_seconds", []):
+            hosts.setdefault(entry["labels"]["host"], {})["rate_limit_wait_seconds"] = entry["sum"]
+
+        platforms = {}
+        records = by_label(counters.get("records_parsed_total", []), "platform")
+        for entry in histograms.get("parse_seconds", []):
+            platform = entry["labels"]["platform"]
+            count = records.get(platform, 0)
+            platforms[platform] = {"records": count, "parse_seconds": entry["sum"],
+                                   "parse_seconds_per_record": entry["sum"] / count if count else None}
+        return {
+            "hosts": hosts,
+            "platforms": platforms,
+            "save_seconds": sum(entry["sum"] for entry in histograms.get("save_seconds", [])),
+        }
+
+    def to_prometheus(self):
+        """Returns every series in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+        previous = None
+        for (name, labels), value in counters:
+            metric = PROMETHEUS_PREFIX + name
+            if name != previous:
+                lines.append(f"# TYPE {metric} counter")
+                previous = name
+            lines.append(f"{metric}{_prometheus_labels(labels)} {value}")
+        for (name, labels), histogram in histograms:
+            metric = PROMETHEUS_PREFIX + name
+            if name != previous:
+                lines.append(f"# TYPE {metric} histogram")
+                previous = name
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (math.inf,), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(f"{metric}_bucket{_prometheus_labels(labels, le=le)} {cumulative}")
+            lines.append(f"{metric}_sum{_prometheus_labels(labels)} {histogram.sum}")
+            lines.append(f"{metric}_count{_prometheus_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path):
+        """Writes the JSON run report to ``path`` atomically."""
+        _write_atomic(path, json.dumps(self.report(), ensure_ascii=False, indent=4))
+
+    def write_prometheus(self, path):
+        """Writes the Prometheus text export to ``path`` atomically, e.g. for a textfile collector."""
+        _write_atomic(path, self.to_prometheus())
+
+    def log_summary(self):
+        """Logs the per-host request and per-platform parsing statistics."""
+        summary = self.report()["summary"]
+        for host, stats in sorted(summary["hosts"].items()):
+            mean = stats.get("mean_seconds")
+            logging.info(f"{host}: {stats.get('requests', 0)} requests"
+                         + (f", mean {mean * 1000:.0f} ms" if mean is not None else "")
+                         + f", {stats.get('bytes', 0) / 1e6:.1f} MB, {stats.get('retries', 0)} retries, "
+                         f"{stats.get('throttled', 0)} throttled, "
+                         f"{stats.get('rate_limit_wait_seconds', 0.0):.1f}s waiting for the rate limit")
+        for platform, stats in sorted(summary["platforms"].items()):
+            per_record = stats["parse_seconds_per_record"]
+            logging.info(f"{platform}: parsed {stats['records']} records in {stats['parse_seconds']:.2f}s"
+                         + (f" ({per_record * 1e6:.0f} µs/record)" if per_record is not None else ""))
+        logging.info(f"Saving took {summary['save_seconds']:.2f}s")
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+_shared_metrics = None
+_shared_lock = threading.Lock()
+
+
+def get_metrics():
+    """Returns the process-wide metrics registry, creating it on first use."""
+    global _shared_metrics
+    with _shared_lock:
+        if _shared_metrics is None:
+            _shared_metrics = Metrics()
+        return _shared_metrics
+
+
+def set_metrics(metrics):
+    """Replaces the process-wide metrics registry, e.g. to collect one registry per run."""
+    global _shared_metrics
+    with _shared_lock:
+        _shared_metrics = metrics
@@ -0,0 +1,178 @@
+# paper_fetcher/multi_fetcher.py
+import logging
+import time
+from collections import OrderedDict
+
+from .abstract_fetcher import AbstractPaperFetcher
+from .dedup import IdentityIndex, clean_value, paper_identity
+from .paper import Paper
+from .utils import iter_concurrently
+
+
+def _citation_count(value):
+    """Returns a citation count as an int, or None if it is missing or not numeric."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def merge_paper(target, other):
+    """
+    Merges the fields of ``other`` into ``target`` in place.
+
+    Missing fields are filled from ``other``; the longest abstract, the union of ISSNs and
+    the highest citation count win.
+
+    Args:
+        target (Paper): Record kept in the merged output.
+        other (Paper): Matching record from another source.
+
+    Returns:
+        Paper: The updated ``target``.
+    """
+    for field, value in other.items():
+        if field == "sources" or clean_value(value) is None:
+            continue
+        current = clean_value(target.get(field))
+        if current is None:
+            target[field] = value
+        elif field == "abstract" and len(str(value).strip()) > len(current):
+            target[field] = value
+        elif field == "issn":
+            issns = [issn.strip() for issn in f"{current},{value}".split(',') if clean_value(issn)]
+            target[field] = ', '.join(dict.fromkeys(issns))
+        elif field == "citation_count":
+            counts = [c for c in (_citation_count(current), _citation_count(value)) if c is not None]
+            if counts:
+                target[field] = max(counts)
+    target.sources = list(dict.fromkeys((target.sources or []) + (other.sources or [])))
+    return target
+
+
+class PaperMerger:
+    """
+    Incrementally merges records from several sources, matching them with ``same_paper``
+    (DOI, arXiv id and PMID, or normalized title and year for records without those).
+
+    New papers are held in a merge window of the last ``window`` new papers, where records of
+    them from other sources are merged in. A paper pushed out of the window is released and
+    never changes again; later records of it are only counted in ``dropped``. Without a
+    window every paper is held until ``drain``.
+
+    Attributes:
+        window (int): Number of papers held for merging, or None for all.
+        dropped (int): Number of records of already released papers that were not merged.
+    """
+
+    def __init__(self, window=None):
+        self.window = window
+        self.dropped = 0
+        self._held = OrderedDict()
+        self._count = 0
+        self._index = IdentityIndex()
+
+    def add(self, paper, source=None):
+        """
+        Adds a record, merging it into a held record of the same paper if there is one.
+
+        Returns:
+            Paper: The oldest held paper if it left the merge window, or None.
+        """
+        paper = Paper.coerce(paper).copy()
+        if source and not paper.sources:
+            paper.sources = [source]
+        identity = paper_identity(paper)
+        number = self._index.find(identity)
+        if number is None:
+            number = self._count
+            self._count += 1
+            self._held[number] = paper
+        elif number in self._held:
+            target = self._held[number]
+            merge_paper(target, paper)
+            # The merged record may have gained identifiers to be found by.
+            identity = paper_identity(target)
+        else:
+            self.dropped += 1
+        self._index.add(identity, number)
+        if self.window is not None and len(self._held) > self.window:
+            return self._held.popitem(last=False)[1]
+        return None
+
+    def drain(self):
+        """Releases the held papers, oldest first."""
+        while self._held:
+            yield self._held.popitem(last=False)[1]
+
+
+class MultiPlatformFetcher(AbstractPaperFetcher):
+    """
+    Fetcher that searches several platforms concurrently and merges their results into one
+    deduplicated output. Wall time approaches that of the slowest platform.
+
+    Pages of every platform are streamed and merged as they arrive. ``iter_papers`` holds
+    each paper in a merge window of the last ``merge_window`` new papers, where records of it
+    from other platforms are merged in, and only yields it once it leaves the window, so
+    saving goes on in batches while the platforms are still being searched and saved papers
+    are final. Records arriving after their paper left the window are dropped.
+    ``fetch_papers`` merges the whole result set.
+
+    Attributes:
+        fetchers (dict): Platform fetchers keyed by platform name.
+        merge_window (int): Number of papers held back for merging by ``iter_papers``.
+    """
+
+    metrics_platform = "multi"
+
+    def __init__(self, json_file_name, platforms, platform_options=None, merge_window=2000, **kwargs):
+        super().__init__(json_file_name, **kwargs)
+        from .registry import get_fetcher_class
+        platform_options = platform_options or {}
+        # Platform fetchers only search; saving and deduplication happen here.
+        self.fetchers = {
+            platform: get_fetcher_class(platform)(json_file_name, cache_enabled=False, storage=self.storage,
+                                                  dedup=False, **platform_options.get(platform, {}))
+            for platform in platforms
+        }
+        self.merge_window = merge_window
+        # Enrich the merged results if any platform enriches its own by default.
+        if kwargs.get("enrich") is None and self.enricher is None:
+            self.enricher = next((fetcher.enricher for fetcher in self.fetchers.values()
+                                  if fetcher.enricher is not None), None)
+
+    def fetch_papers(self, search_params=None, max_results=10):
+        """Fetch papers from all platforms concurrently and merge them."""
+        return list(self._merged_papers(search_params, max_results, PaperMerger()))
+
+    def iter_papers(self, search_params=None, max_results=10):
+        """Yield merged papers from all platforms as they leave the merge window."""
+        yield from self._merged_papers(search_params, max_results, PaperMerger(self.merge_window))
+
+    def _merged_papers(self, search_params, max_results, merger):
+        failed = []
+        start = time.monotonic()
+
+        def fetch(platform, fetcher):
+            count = 0
+            try:
+                for paper in fetcher.iter_papers(search_params, max_results):
+                    yield paper
+                    count += 1
+                logging.info(f"{platform}: {count} papers after {time.monotonic() - start:.1f}s")
+            except Exception as e:
+                logging.error(f"Error fetching papers from {platform}: {e}")
+                failed.append(platform)
+
+        sources = [(platform, fetch(platform, fetcher)) for platform, fetcher in self.fetchers.items()]
+        for platform, paper in iter_concurrently(sources, len(sources), thread_name_prefix="platform"):
+            paper = merger.add(paper, source=platform)
+            if paper is not None:
+                yield paper
+        yield from merger.drain()
+        if merger.dropped:
+            logging.info(f"{merger.dropped} records arrived after their paper left the merge window "
+                         "and were not merged")
+        if failed:
+            # The other platforms' papers are kept, but the results are incomplete.
+            raise RuntimeError(f"Could not fetch papers from {', '.join(failed)}")
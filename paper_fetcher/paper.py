@@ -0,0 +1,244 @@
+# paper_fetcher/paper.py
+import sys
+from operator import attrgetter
+
+from .dedup import PLACEHOLDER_VALUES
+
+# Fields of a paper record, in serialization order.
+FIELDS = ("title", "authors", "abstract", "year", "date", "journal", "volume", "pages", "number",
+          "publisher", "issn", "doi", "url", "pmid", "arxiv_id", "citation_count", "sources")
+
+# Fields stored as int; ``year`` keeps the first four digits of dates such as '2020-05'.
+INT_FIELDS = {"year", "citation_count"}
+
+# Fields shared by many records, stored as interned strings so equal values share one object.
+INTERNED_FIELDS = {"journal", "issn", "publisher"}
+
+# Fields kept as given instead of being converted to a stripped string.
+RAW_FIELDS = {"sources"}
+
+# Legacy record keys and the field they map to.
+ALIASES = {"author": "authors"}
+
+_FIELD_SET = frozenset(FIELDS)
+_PLACEHOLDER_LENGTH = max(map(len, PLACEHOLDER_VALUES))
+_UNCONVERTED_FIELDS = INT_FIELDS | RAW_FIELDS
+_field_values = attrgetter(*FIELDS)
+
+
+def _text(value):
+    """Returns a field value as a stripped string, or None if it is missing or a placeholder."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    # Longer values cannot be placeholders; skip lower-casing e.g. whole abstracts.
+    if len(value) <= _PLACEHOLDER_LENGTH and value.lower() in PLACEHOLDER_VALUES:
+        return None
+    return value
+
+
+def _int(value, digits=None):
+    """Returns a field value as an int (from its first ``digits`` characters), or None."""
+    if value is None or isinstance(value, int):
+        return value
+    value = _text(value)
+    if value is not None and digits:
+        value = value[:digits]
+    return int(value) if value and value.isdigit() else None
+
+
+def _interned(value):
+    value = _text(value)
+    return sys.intern(value) if value is not None else None
+
+
+def _convert(name, value):
+    """Converts a field value to its stored type, mapping missing and placeholder values to None."""
+    if name in RAW_FIELDS:
+        return value
+    if name == "year":
+        return _int(value, 4)
+    if name in INT_FIELDS:
+        return _int(value)
+    if name in INTERNED_FIELDS:
+        return _interned(value)
+    return _text(value)
+
+
+class Paper:
+    """
+    Record of one fetched paper.
+
+    Fields are typed slots: ``year`` and ``citation_count`` are ints, the others strings,
+    and missing values are None instead of ``"N/A"`` placeholders. Journal, ISSN and
+    publisher strings are interned. Keys outside ``FIELDS`` (e.g. from older result files)
+    are kept in ``extra`` so records round-trip unchanged.
+
+    Papers also support the read/write subset of the dict interface used on records
+    (``get``, ``[]``, ``in``, ``items``), so helpers work on both papers and plain dicts.
+
+    Attributes:
+        title (str): Title.
+        authors (str): Comma-separated author names.
+        abstract (str): Abstract.
+        year (int): Publication year.
+        date (str): Date used for incremental harvesting, ``YYYY-MM-DD``.
+        journal (str): Journal or venue.
+        volume (str): Journal volume.
+        pages (str): Page range.
+        number (str): Journal issue.
+        publisher (str): Publisher.
+        issn (str): Comma-separated ISSNs.
+        doi (str): DOI.
+        url (str): URL of the paper (the PMID for PubMed records).
+        pmid (str): PubMed id.
+        arxiv_id (str): arXiv id.
+        citation_count (int): Number of citations.
+        sources (list): Platforms the record was merged from.
+        extra (dict): Fields outside ``FIELDS``, or None.
+    """
+
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, title=None, authors=None, abstract=None, year=None, date=None, journal=None,
+                 volume=None, pages=None, number=None, publisher=None, issn=None, doi=None, url=None,
+                 pmid=None, arxiv_id=None, citation_count=None, sources=None, **extra):
+        self.title = _text(title)
+        self.authors = _text(authors)
+        self.abstract = _text(abstract)
+        self.year = _int(year, 4)
+        self.date = _text(date)
+        self.journal = _interned(journal)
+        self.volume = _text(volume)
+        self.pages = _text(pages)
+        self.number = _text(number)
+        self.publisher = _interned(publisher)
+        self.issn = _interned(issn)
+        self.doi = _text(doi)
+        self.url = _text(url)
+        self.pmid = _text(pmid)
+        self.arxiv_id = _text(arxiv_id)
+        self.citation_count = _int(citation_count)
+        self.sources = sources
+        self.extra = None
+        for name, value in extra.items():
+            self[name] = value
+
+    @classmethod
+    def from_dict(cls, record):
+        """Creates a paper from a JSON record, including records written before this type existed."""
+        paper = cls._from_stored(record)
+        return paper if paper is not None else cls(**record)
+
+    @classmethod
+    def _from_stored(cls, record):
+        """
+        Creates a paper from a record in the form ``to_dict`` writes, storing its values
+        without normalizing them, or returns None if the record is not in that form: extra or
+        legacy keys, values of the wrong type, or placeholders, as in files written before
+        this type existed. Stored strings are trusted to be stripped already.
+        """
+        if not _FIELD_SET.issuperset(record):
+            return None
+        get = record.get
+        year = get("year")
+        citation_count = get("citation_count")
+        if (year is not None and type(year) is not int) or \
+                (citation_count is not None and type(citation_count) is not int):
+            return None
+        for name, value in record.items():
+            if type(value) is str:
+                if len(value) <= _PLACEHOLDER_LENGTH and value.lower() in PLACEHOLDER_VALUES:
+                    return None
+            elif value is None or name not in _UNCONVERTED_FIELDS:
+                return None
+        paper = cls.__new__(cls)
+        paper.title = get("title")
+        paper.authors = get("authors")
+        paper.abstract = get("abstract")
+        paper.year = year
+        paper.date = get("date")
+        journal = get("journal")
+        paper.journal = sys.intern(journal) if journal is not None else None
+        paper.volume = get("volume")
+        paper.pages = get("pages")
+        paper.number = get("number")
+        publisher = get("publisher")
+        paper.publisher = sys.intern(publisher) if publisher is not None else None
+        issn = get("issn")
+        paper.issn = sys.intern(issn) if issn is not None else None
+        paper.doi = get("doi")
+        paper.url = get("url")
+        paper.pmid = get("pmid")
+        paper.arxiv_id = get("arxiv_id")
+        paper.citation_count = citation_count
+        paper.sources = get("sources")
+        paper.extra = None
+        return paper
+
+    @classmethod
+    def coerce(cls, record):
+        """Returns a record as a paper, converting plain dicts."""
+        return record if isinstance(record, cls) else cls.from_dict(record)
+
+    def to_dict(self):
+        """Returns the record as a dict of its set fields, ready for JSON serialization."""
+        record = {name: value for name, value in zip(FIELDS, _field_values(self)) if value is not None}
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+    def copy(self):
+        paper = Paper.__new__(Paper)
+        for name in self.__slots__:
+            setattr(paper, name, getattr(self, name))
+        if self.sources is not None:
+            paper.sources = list(self.sources)
+        if self.extra is not None:
+            paper.extra = dict(self.extra)
+        return paper
+
+    def items(self):
+        """Yields ``(field, value)`` pairs of the set fields, then of the extra fields."""
+        for name in FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                yield name, value
+        if self.extra:
+            yield from self.extra.items()
+
+    def get(self, name, default=None):
+        name = ALIASES.get(name, name)
+        value = getattr(self, name) if name in _FIELD_SET else (self.extra or {}).get(name)
+        return default if value is None else value
+
+    def __getitem__(self, name):
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __setitem__(self, name, value):
+        name = ALIASES.get(name, name)
+        if name in _FIELD_SET:
+            setattr(self, name, _convert(name, value))
+        elif value is not None:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[name] = value
+        elif self.extra:
+            self.extra.pop(name, None)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __eq__(self, other):
+        if not isinstance(other, Paper):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    # Papers are mutable and compare by value, so they are unhashable, like dicts.
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Paper(title={self.title!r}, doi={self.doi!r}, url={self.url!r})"
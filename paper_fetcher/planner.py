@@ -0,0 +1,221 @@
+# paper_fetcher/planner.py
+import logging
+from datetime import date, timedelta
+
+from .abstract_fetcher import AbstractPaperFetcher
+from .dedup import IdentityIndex, paper_identity
+from .utils import iter_concurrently
+
+DEFAULT_EARLIEST_DATE = "1900-01-01"
+
+
+class DateSlice:
+    """
+    Inclusive range of publication dates of a sub-query, and its number of results.
+
+    Attributes:
+        start (date): First day of the range.
+        end (date): Last day of the range.
+        count (int): Number of results of the sub-query, or None if not counted yet.
+    """
+
+    def __init__(self, start, end, count=None):
+        self.start = start
+        self.end = end
+        self.count = count
+
+    @property
+    def days(self):
+        return (self.end - self.start).days + 1
+
+    def bisect(self):
+        """Splits the range into two halves; the first holds the extra day of an odd range."""
+        middle = self.start + timedelta(days=(self.days - 1) // 2)
+        return DateSlice(self.start, middle), DateSlice(middle + timedelta(days=1), self.end)
+
+    def search_params(self, search_params):
+        """Returns the search parameters restricted to this range."""
+        return dict(search_params or {}, date_from=self.start.isoformat(), date_to=self.end.isoformat())
+
+    def __repr__(self):
+        return f"DateSlice({self.start.isoformat()}..{self.end.isoformat()}, count={self.count})"
+
+
+class QueryPlanner:
+    """
+    Partitions a search into disjoint publication-date slices that each fit the platform's
+    per-query cap, and fetches the slices in parallel.
+
+    Planning counts the whole range first, then bisects every slice over the cap until it
+    fits (or is a single day), counting both halves of a split concurrently. Slices without
+    results are dropped. Fetching runs ``workers`` slices at a time through the fetcher's
+    transport, hence under its rate limits, and streams their papers as they arrive,
+    skipping papers already yielded by another slice.
+
+    The fetcher must provide ``count_results``, honor the ``date_from``/``date_to`` search
+    parameters and set ``max_results_per_query``. Results without a publication date in the
+    planned range are not covered; their number is logged.
+
+    Attributes:
+        fetcher (AbstractPaperFetcher): Fetcher running the sub-queries.
+        workers (int): Maximum number of slices fetched at once.
+        max_results_per_query (int): Largest number of results a slice may hold.
+    """
+
+    def __init__(self, fetcher, workers=4, max_results_per_query=None):
+        if not hasattr(fetcher, "count_results"):
+            raise ValueError(f"{type(fetcher).__name__} does not support splitting searches")
+        self.fetcher = fetcher
+        self.workers = workers
+        self.max_results_per_query = max_results_per_query or fetcher.max_results_per_query
+
+    def date_range(self, search_params):
+        """
+        Returns the publication date range to plan: ``date_from``/``date_to`` if given, else
+        the ``year`` search parameter, else the platform's earliest date up to today.
+        """
+        search_params = search_params or {}
+        year = str(search_params.get("year") or "").strip()
+        start = search_params.get("date_from") or (f"{year}-01-01" if year.isdigit() else None)
+        end = search_params.get("date_to") or (f"{year}-12-31" if year.isdigit() else None)
+        start = date.fromisoformat(start or getattr(self.fetcher, "earliest_date", DEFAULT_EARLIEST_DATE))
+        end = date.fromisoformat(end) if end else date.today()
+        return DateSlice(start, end)
+
+    def _count(self, search_params, slices):
+        counts = self.fetcher.transport.map(
+            lambda date_slice: self.fetcher.count_results(date_slice.search_params(search_params)), slices)
+        for date_slice, count in zip(slices, counts):
+            date_slice.count = count
+
+    def iter_slices(self, search_params=None):
+        """
+        Splits a search into date slices of at most ``max_results_per_query`` results, lazily.
+
+        Slices over the cap are bisected depth first, counting both halves concurrently, so
+        slices come out in date order and planning stops as soon as the caller stops reading.
+
+        Args:
+            search_params (dict, optional): Search conditions.
+
+        Yields:
+            DateSlice: Non-empty slices in date order, each with its result count.
+        """
+        whole = self.date_range(search_params)
+        self._count(search_params, [whole])
+        stack = [whole]
+        while stack:
+            date_slice = stack.pop()
+            if date_slice.count <= self.max_results_per_query or date_slice.days == 1:
+                if date_slice.count > self.max_results_per_query:
+                    logging.warning(f"{date_slice} exceeds the cap of {self.max_results_per_query} "
+                                    "results in a single day; it will be truncated")
+                if date_slice.count:
+                    yield date_slice
+            else:
+                halves = date_slice.bisect()
+                self._count(search_params, halves)
+                stack.extend(reversed(halves))
+
+    def plan(self, search_params=None):
+        """
+        Splits a search into date slices of at most ``max_results_per_query`` results.
+
+        Args:
+            search_params (dict, optional): Search conditions.
+
+        Returns:
+            list: ``DateSlice`` objects in date order, each with its result count.
+        """
+        total = self.fetcher.count_results(search_params)
+        whole = self.date_range(search_params)
+        planned = list(self.iter_slices(search_params))
+        covered = sum(date_slice.count for date_slice in planned)
+        logging.info(f"Planned {len(planned)} slices covering {covered} of {total} results")
+        if covered < total:
+            logging.warning(f"{total - covered} results have no publication date between "
+                            f"{whole.start} and {whole.end} and are not fetched")
+        return planned
+
+    def iter_papers(self, search_params=None, max_results=None):
+        """
+        Plans a search and yields the papers of its slices as they are fetched, without duplicates.
+
+        A search whose ``max_results`` fits in one query is not split. Otherwise slices are
+        planned as they are needed and each is capped at the number of papers still missing;
+        papers are streamed from the slices through a bounded queue, and planning and fetching
+        stop once ``max_results`` papers have been yielded.
+
+        Args:
+            search_params (dict, optional): Search conditions.
+            max_results (int, optional): Maximum number of papers to yield, or None for all.
+
+        Yields:
+            Paper: Fetched papers.
+        """
+        if max_results is not None and max_results <= self.max_results_per_query:
+            yield from self.fetcher.iter_papers(search_params, max_results)
+            return
+        seen = IdentityIndex()
+        yielded = 0
+
+        def fetch_slice(date_slice, limit):
+            fetched = 0
+            for paper in self.fetcher.iter_papers(date_slice.search_params(search_params), limit):
+                yield paper
+                fetched += 1
+            logging.info(f"Fetched {fetched} papers from {date_slice}")
+
+        def slice_sources():
+            # Each slice is capped when it starts, at the papers still missing and at the
+            # per-query cap, which truncates single days over it.
+            for date_slice in self.iter_slices(search_params):
+                limit = self.max_results_per_query
+                if max_results is not None:
+                    limit = min(limit, max_results - yielded)
+                yield date_slice, fetch_slice(date_slice, limit)
+
+        for _, paper in iter_concurrently(slice_sources(), self.workers, thread_name_prefix="slice"):
+            identity = paper_identity(paper)
+            if seen.find(identity):
+                continue
+            seen.add(identity)
+            yield paper
+            yielded += 1
+            if max_results is not None and yielded >= max_results:
+                return
+
+
+class PlannedFetcher(AbstractPaperFetcher):
+    """
+    Fetcher splitting each search of a platform into date slices fetched in parallel by a
+    ``QueryPlanner``, so harvests larger than the platform's per-query cap are complete.
+
+    Planned harvests are not incremental: slices complete out of order, so there is no
+    single cursor to resume from.
+
+    Attributes:
+        fetcher (AbstractPaperFetcher): Platform fetcher running the sub-queries.
+        planner (QueryPlanner): Planner splitting the searches.
+    """
+
+    def __init__(self, json_file_name, platform, workers=4, platform_options=None, **kwargs):
+        super().__init__(json_file_name, **kwargs)
+        from .registry import get_fetcher_class
+        # The platform fetcher only searches; saving and deduplication happen here.
+        self.fetcher = get_fetcher_class(platform)(
+            json_file_name, cache_enabled=False, storage=self.storage, dedup=False, enrich=False,
+            transport=self.transport, **(platform_options or {}).get(platform, {}))
+        self.planner = QueryPlanner(self.fetcher, workers)
+
+    @property
+    def metrics_platform(self):
+        return self.fetcher.metrics_platform
+
+    def fetch_papers(self, search_params=None, max_results=10):
+        """Fetch papers of every date slice of the search."""
+        return list(self.iter_papers(search_params, max_results))
+
+    def iter_papers(self, search_params=None, max_results=10):
+        """Yield papers of the date slices of the search as each slice completes."""
+        yield from self.planner.iter_papers(search_params, max_results)
@@ -1,31 +1,101 @@
 # paper_fetcher/pubmed_fetcher.py
-import logging
+import io
+import os
+from urllib.parse import urlsplit
 from xml.etree import ElementTree as ET
 
-import requests
-
 from .abstract_fetcher import AbstractPaperFetcher
+from .paper import Paper
+
+# (parent tag, tag) of the element whose text fills each field; a None parent matches any.
+ARTICLE_FIELDS = {
+    (None, "ISSN"): "issn",
+    (None, "ArticleTitle"): "title",
+    ("Abstract", "AbstractText"): "abstract",
+    ("PubDate", "Year"): "year",
+    ("Journal", "Title"): "journal",
+    ("Journal", "Volume"): "volume",
+    ("Pagination", "MedlinePgn"): "pages",
+    ("Journal", "Issue"): "number",
+    (None, "PublisherName"): "publisher",
+}
+
+# Large subtrees holding none of the extracted fields.
+SKIPPED_SUBTREES = {"MeshHeadingList", "ReferenceList", "CommentsCorrectionsList", "KeywordList",
+                    "ChemicalList", "GrantList", "MedlineJournalInfo"}
 
 
 class PubMedFetcher(AbstractPaperFetcher):
     """
-    Fetcher for PubMed academic papers.
+    Fetcher for PubMed academic papers. Search results are paged with ``retstart``.
+
+    Article details are retrieved with batched ``efetch`` calls: either comma-joined
+    ID chunks of ``batch_size`` PMIDs, or (with ``use_history``) pages read from the
+    esearch history server via ``WebEnv``/``query_key``. An NCBI API key, taken from
+    ``api_key`` or the ``NCBI_API_KEY`` environment variable, raises the rate limit for
+    the E-utilities host from 3 to 10 requests per second. Detail chunks are fetched
+    concurrently through the shared transport.
+
+    With a response cache on the transport, article records are cached one PMID at a time,
+    so overlapping queries only download the articles they have not seen before.
+
+    Incremental harvests restrict esearch to Entrez dates (``datetype=edat``) from the
+    ``since`` watermark on, and resume from the ``retstart`` offset of the last page.
+
+    The ``date_from`` and ``date_to`` search parameters (``YYYY-MM-DD``, inclusive) restrict
+    the search to a ``[PDAT]`` publication date range, which the query planner uses to split
+    searches larger than the esearch cap.
     """
 
-    def __init__(self, json_file_name):
-        super().__init__(json_file_name)
+    platform = "pubmed"
+    # esearch only returns the first 10,000 PMIDs of a query.
+    max_results_per_query = 10000
+    earliest_date = "1800-01-01"
+    ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+    EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+
+    def __init__(self, json_file_name, batch_size=200, api_key=None, use_history=False, **kwargs):
+        super().__init__(json_file_name, **kwargs)
+        self.batch_size = batch_size
+        self.api_key = api_key or os.environ.get("NCBI_API_KEY")
+        self.use_history = use_history
+        self.search_page_size = 1000
+        self.history_pages_in_flight = 4
+        if self.api_key:
+            # NCBI allows 3 requests/second without a key and 10 with one.
+            self.transport.rate_limiter.set_rate(urlsplit(self.EFETCH_URL).hostname, 10.0)
 
     def fetch_papers(self, search_params=None, max_results=10):
         """Fetch papers from PubMed based on search parameters."""
-        query = self._build_query(search_params)
-        response = requests.get('https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi',
-                                params={'db': 'pubmed', 'term': query, 'retmax': max_results, 'retmode': 'json'})
-        if response.status_code == 200:
-            ids = response.json().get("esearchresult", {}).get("idlist", [])
-            return [self._fetch_article_details(article_id) for article_id in ids]
-        else:
-            logging.error(f"Error fetching from PubMed: {response.status_code}")
-            return []
+        return list(self.iter_papers(search_params, max_results))
+
+    def iter_papers(self, search_params=None, max_results=10):
+        """Yield papers from PubMed, paging esearch results with ``retstart``."""
+        retstart = int(search_params.get('cursor') or 0)
+        if self.use_history:
+            yield from self._iter_from_history(search_params, retstart, max_results)
+            return
+
+        fetched = 0
+        while max_results is None or fetched < max_results:
+            retmax = self.search_page_size if max_results is None else min(self.search_page_size, max_results - fetched)
+            retmax = min(retmax, self.max_results_per_query - retstart)
+            if retmax <= 0:
+                # Stopping here would pass the remaining results off as a finished harvest.
+                raise RuntimeError(f"PubMed esearch stops at {self.max_results_per_query} results; "
+                                   "split the search to fetch the rest")
+            self.resume_cursor = retstart
+            response = self._request('GET', self.ESEARCH_URL, self._esearch_params(
+                search_params, retstart=retstart, retmax=retmax), use_cache=False)
+            response.raise_for_status()
+            result = response.json().get("esearchresult", {})
+            ids = result.get("idlist", [])
+            yield from self._fetch_articles_details(ids)
+            fetched += len(ids)
+            retstart += retmax
+            self.resume_cursor = retstart
+            if len(ids) < retmax or retstart >= int(result.get("count", 0)):
+                return
 
     def _build_query(self, search_params):
         """Helper to construct the PubMed search query string."""
@@ -35,30 +105,179 @@ class PubMedFetcher(AbstractPaperFetcher):
         year = search_params.get('year', '')
         return f"{keyword}[Title/Abstract] {author}[Author] {journal}[Journal] {year}[Publication Date]".strip()
 
-    def _fetch_article_details(self, article_id):
-        """Fetch detailed information for a specific article from PubMed."""
-        details_url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?db=pubmed&id={article_id}&retmode=xml"
-        response = requests.get(details_url)
-        if response.status_code == 200:
-            return self._parse_article_details(response.content)
-        else:
-            logging.error(f"Error fetching article details for ID {article_id}: {response.status_code}")
+    def count_results(self, search_params=None):
+        """Return the total number of results of a search, without fetching them."""
+        response = self._request('GET', self.ESEARCH_URL, self._esearch_params(search_params or {}, retmax=0),
+                                 use_cache=False)
+        response.raise_for_status()
+        return int(response.json().get("esearchresult", {}).get("count", 0))
+
+    def _esearch_params(self, search_params, **extra):
+        """
+        Build esearch parameters, restricted to Entrez dates from the ``since`` watermark on
+        and to publication dates within ``date_from``/``date_to``.
+        """
+        term = self._build_query(search_params)
+        date_from = search_params.get('date_from')
+        date_to = search_params.get('date_to')
+        if date_from or date_to:
+            start = (date_from or self.earliest_date).replace('-', '/')
+            end = (date_to or '3000-12-31').replace('-', '/')
+            term += f' AND ("{start}"[PDAT] : "{end}"[PDAT])'
+        params = {'db': 'pubmed', 'term': term, 'retmode': 'json'}
+        since = search_params.get('since')
+        if since:
+            params.update(datetype='edat', mindate=since.replace('-', '/'), maxdate='3000')
+        params.update(extra)
+        return params
+
+    def _request(self, method, url, params, use_cache=True):
+        """
+        Send an E-utilities request through the rate-limited transport. Searches and history
+        pages pass ``use_cache=False``: their results and WebEnv sessions are live.
+        """
+        if self.api_key:
+            params = dict(params, api_key=self.api_key)
+        if method == 'POST':
+            return self.transport.post(url, data=params)
+        return self.transport.get(url, params=params, use_cache=use_cache)
+
+    def _fetch_articles_details(self, article_ids):
+        """Fetch detailed information for a list of PMIDs in concurrent chunks of ``batch_size``."""
+        papers_by_id = self._lookup_cached_articles(article_ids)
+        missing = [article_id for article_id in article_ids if article_id not in papers_by_id]
+        chunks = [missing[start:start + self.batch_size]
+                  for start in range(0, len(missing), self.batch_size)]
+        for papers in self.transport.map(self._fetch_chunk, chunks):
+            papers_by_id.update((paper.pmid, paper) for paper in papers)
+        return [papers_by_id[article_id] for article_id in article_ids if article_id in papers_by_id]
+
+    def _article_cache_key(self, article_id):
+        """Cache key of a single article: that of a one-PMID efetch request."""
+        return self.transport.cache.make_key(
+            'GET', self.EFETCH_URL, {'db': 'pubmed', 'id': article_id, 'retmode': 'xml'})
+
+    def _lookup_cached_articles(self, article_ids):
+        """Return the fresh cached records among ``article_ids``, keyed by PMID."""
+        cache = self.transport.cache
+        if cache is None:
             return {}
+        papers_by_id = {}
+        for article_id in article_ids:
+            entry = cache.lookup(self._article_cache_key(article_id))
+            if entry is not None and cache.is_fresh(entry):
+                cache.record("hits")
+                papers = self._parse(self._parse_article_details, entry["body"])
+                papers_by_id.update((paper.pmid, paper) for paper in papers)
+            else:
+                cache.record("misses")
+        return papers_by_id
+
+    def _fetch_chunk(self, chunk):
+        """Fetch and parse one chunk of PMIDs with a single efetch call."""
+        # POST keeps long ID lists out of the URL, as recommended by NCBI.
+        response = self._request('POST', self.EFETCH_URL, {
+            'db': 'pubmed', 'id': ','.join(chunk), 'retmode': 'xml'})
+        response.raise_for_status()
+        if self.transport.cache is None:
+            return self._parse(self._parse_article_details, response.content)
+        return self._parse(self._parse_and_cache_articles, response.content)
+
+    def _parse_and_cache_articles(self, xml_content):
+        """Parse an efetch XML document, caching each article on its own under its PMID."""
+        cache = self.transport.cache
+        papers = []
+        for article in self._iter_articles(xml_content):
+            paper = self._parse_article(article)
+            if paper.pmid:
+                cache.store(self._article_cache_key(paper.pmid), self.EFETCH_URL, 200,
+                            {"Content-Type": "text/xml"}, ET.tostring(article, encoding='utf-8'))
+            papers.append(paper)
+        return papers
+
+    def _iter_from_history(self, search_params, offset, max_results):
+        """Run one esearch on the history server, then yield its articles page by page from ``offset``."""
+        response = self._request('GET', self.ESEARCH_URL, self._esearch_params(
+            search_params, retmax=0, usehistory='y'), use_cache=False)
+        response.raise_for_status()
+        result = response.json().get("esearchresult", {})
+        end = int(result.get("count", 0))
+        if max_results is not None:
+            end = min(end, offset + max_results)
+        # Fetch a few pages concurrently at a time to keep memory bounded.
+        step = self.batch_size * self.history_pages_in_flight
+        for start in range(offset, end, step):
+            self.resume_cursor = start
+            yield from self._fetch_from_history(result.get("webenv"), result.get("querykey"),
+                                                start, min(step, end - start))
+        self.resume_cursor = max(offset, end)
+
+    def _fetch_from_history(self, webenv, query_key, start, count):
+        """Fetch ``count`` articles from offset ``start`` of the esearch history server in concurrent pages."""
+        def fetch_page(page_start):
+            response = self._request('GET', self.EFETCH_URL, {
+                'db': 'pubmed', 'WebEnv': webenv, 'query_key': query_key, 'retstart': page_start,
+                'retmax': min(self.batch_size, start + count - page_start), 'retmode': 'xml'},
+                use_cache=False)
+            response.raise_for_status()
+            return self._parse(self._parse_article_details, response.content)
+
+        pages = self.transport.map(fetch_page, range(start, start + count, self.batch_size))
+        return [paper for papers in pages for paper in papers]
 
     def _parse_article_details(self, xml_content):
-        """Parse XML content from PubMed and extract article information."""
-        root = ET.fromstring(xml_content)
-        return {
-            "issn": root.findtext(".//ISSN", "N/A"),
-            "title": root.findtext(".//ArticleTitle", "N/A"),
-            "authors": ', '.join(f"{author.findtext('ForeName', 'N/A')} {author.findtext('LastName', 'N/A')}" for author in root.findall(".//Author")),
-            "abstract": root.findtext(".//Abstract/AbstractText", "N/A"),
-            "year": root.findtext(".//PubDate/Year", "N/A"),
-            "journal": root.findtext(".//Journal/Title", "N/A"),
-            "volume": root.findtext(".//Journal/Volume", "N/A"),
-            "pages": root.findtext(".//Pagination/MedlinePgn", "N/A"),
-            "number": root.findtext(".//Journal/Issue", "N/A"),
-            "publisher": root.findtext(".//PublisherName", "N/A"),
-            "doi": root.findtext(".//ELocationID[@EIdType='doi']", "N/A"),
-            "url": root.findtext(".//ArticleId[@IdType='pubmed']", "N/A")
-        }
+        """Parse a PubMed efetch XML document and extract one record per ``PubmedArticle``."""
+        return [self._parse_article(article) for article in self._iter_articles(xml_content)]
+
+    @staticmethod
+    def _iter_articles(xml_content):
+        """
+        Incrementally yield the ``PubmedArticle`` elements of an efetch document or of a single
+        cached article. Each article is cleared once the caller asks for the next one, so memory
+        does not grow with the size of the document.
+        """
+        for _, elem in ET.iterparse(io.BytesIO(xml_content)):
+            if elem.tag == "PubmedArticle":
+                yield elem
+                elem.clear()
+
+    def _parse_article(self, article):
+        """Extract a ``Paper`` from a single ``PubmedArticle`` element in one pass."""
+        fields = {}
+        authors = []
+        entrez = None
+        # Depth-first walk in document order, so each field takes its first match like ``findtext``.
+        stack = [(article, None)]
+        while stack:
+            elem, parent_tag = stack.pop()
+            tag = elem.tag
+            if tag == "Author":
+                name = (' '.join(filter(None, (elem.findtext('ForeName'), elem.findtext('LastName'))))
+                        or elem.findtext('CollectiveName'))
+                if name:
+                    authors.append(name)
+                continue
+            if tag in SKIPPED_SUBTREES:
+                continue
+            field = ARTICLE_FIELDS.get((parent_tag, tag)) or ARTICLE_FIELDS.get((None, tag))
+            if field is not None:
+                fields.setdefault(field, elem.text)
+            elif tag == "ELocationID" and elem.get("EIdType") == "doi":
+                fields.setdefault("doi", elem.text)
+            elif tag == "ArticleId" and elem.get("IdType") == "pubmed":
+                fields.setdefault("pmid", elem.text)
+            elif tag == "PubMedPubDate" and entrez is None and elem.get("PubStatus") == "entrez":
+                entrez = elem
+            stack.extend([(child, tag) for child in reversed(elem)])
+
+        # PubMed records keep their PMID in ``url`` as well.
+        return Paper(authors=', '.join(authors), url=fields.get("pmid"),
+                     date=self._entrez_date(entrez), **fields)
+
+    @staticmethod
+    def _entrez_date(entrez):
+        """Return the date of an entrez ``PubMedPubDate`` element as ``YYYY-MM-DD``, or None."""
+        if entrez is None or not entrez.findtext("Year"):
+            return None
+        return (f"{entrez.findtext('Year')}-{int(entrez.findtext('Month', '1')):02d}"
+                f"-{int(entrez.findtext('Day', '1')):02d}")
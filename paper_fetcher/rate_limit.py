@@ -0,0 +1,219 @@
+# paper_fetcher/rate_limit.py
+import json
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from filelock import FileLock
+
+from .metrics import get_metrics
+
+# Sustained requests per second allowed by each API.
+DEFAULT_RATES = {
+    "eutils.ncbi.nlm.nih.gov": 3.0,      # 10 with an NCBI API key
+    "export.arxiv.org": 1 / 3,           # arXiv asks for one request every 3 seconds
+    "api.crossref.org": 5.0,
+    "scholar.google.com": 0.2,
+}
+DEFAULT_RATE = 5.0
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Returns a full-jitter exponential backoff delay for a 0-based retry attempt."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def parse_retry_after(value):
+    """
+    Parses a ``Retry-After`` header given either in seconds or as an HTTP date.
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def host_of(url_or_host):
+    """Returns the host name of a URL, or the argument itself if it is already a host."""
+    if "://" in url_or_host:
+        return urlsplit(url_or_host).hostname or url_or_host
+    return url_or_host
+
+
+class RateLimiter:
+    """
+    Per-host token-bucket rate limiter. Each host gets a bucket refilled at its allowed
+    rate; ``acquire`` reserves a token and sleeps until it is available. ``penalize``
+    pauses a host after a 429/503 so every caller backs off together.
+
+    When ``state_path`` is given, bucket state lives in that JSON file under a file lock,
+    so the limits hold across threads and processes sharing the file.
+
+    Attributes:
+        rates (dict): Requests per second allowed for each host.
+        state_path (str, optional): JSON file holding the shared bucket state.
+    """
+
+    def __init__(self, rates=None, state_path=None):
+        self.rates = dict(DEFAULT_RATES, **(rates or {}))
+        self.state_path = state_path
+        self._state = {}
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(f"{state_path}.lock") if state_path else None
+
+    def set_rate(self, host, rate):
+        """Sets the allowed requests per second for a host."""
+        self.rates[host] = rate
+
+    def _read_state(self):
+        if self.state_path is None:
+            return self._state
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_state(self, state):
+        if self.state_path is None:
+            self._state = state
+            return
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _update(self, host, func):
+        """Applies ``func(bucket, now, rate)`` to a host's bucket under the thread and file locks."""
+        with self._lock:
+            if self._file_lock is not None:
+                self._file_lock.acquire()
+            try:
+                state = self._read_state()
+                now = time.time()
+                rate = self.rates.get(host, DEFAULT_RATE)
+                capacity = max(1.0, rate)
+                bucket = state.get(host, {"tokens": capacity, "updated": now, "blocked_until": 0.0})
+                bucket["tokens"] = min(capacity, bucket["tokens"] + (now - bucket["updated"]) * rate)
+                bucket["updated"] = now
+                result = func(bucket, now, rate)
+                state[host] = bucket
+                self._write_state(state)
+                return result
+            finally:
+                if self._file_lock is not None:
+                    self._file_lock.release()
+
+    def acquire(self, url_or_host):
+        """
+        Waits until a request to the host is allowed.
+
+        Args:
+            url_or_host (str): Request URL or host name.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        host = host_of(url_or_host)
+
+        def reserve(bucket, now, rate):
+            # Tokens may go negative: each caller reserves its slot in the queue.
+            bucket["tokens"] -= 1
+            wait = max(0.0, -bucket["tokens"] / rate)
+            return wait + max(0.0, bucket.get("blocked_until", 0.0) - now)
+
+        wait = self._update(host, reserve)
+        if wait > 0:
+            get_metrics().observe("rate_limit_wait_seconds", wait, host=host)
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, url_or_host, delay):
+        """
+        Pauses all requests to a host for ``delay`` seconds, e.g. after a 429 or 503.
+
+        Args:
+            url_or_host (str): Request URL or host name.
+            delay (float): Seconds during which the host should not be contacted.
+        """
+        host = host_of(url_or_host)
+
+        def block(bucket, now, rate):
+            bucket["blocked_until"] = max(bucket.get("blocked_until", 0.0), now + delay)
+
+        self._update(host, block)
+
+
+def retry_call(func, *args, host=None, max_retries=5, base_delay=1.0, rate_limiter=None, **kwargs):
+    """
+    Calls ``func`` under the host's rate limit, retrying failures of that single call with
+    jittered exponential backoff. Attempts made for a ``host`` are timed and their retries
+    counted in the shared ``Metrics``.
+
+    Args:
+        func (callable): Function to call.
+        host (str, optional): Host contacted by ``func``, used for rate limiting and backoff.
+        max_retries (int, optional): Maximum number of retries after the first attempt.
+        base_delay (float, optional): Base backoff delay in seconds.
+        rate_limiter (RateLimiter, optional): Limiter to use. Defaults to the shared limiter.
+
+    Returns:
+        The return value of ``func``.
+    """
+    limiter = rate_limiter or get_rate_limiter()
+    metrics = get_metrics()
+    for attempt in range(max_retries + 1):
+        if host:
+            limiter.acquire(host)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except StopIteration:
+            raise
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            if host:
+                metrics.inc("http_retries_total", host=host, reason=type(e).__name__)
+            delay = backoff_delay(attempt, base=base_delay)
+            logging.warning(f"Attempt {attempt + 1} failed: {e}. Retrying in {delay:.1f} seconds...")
+            if host:
+                limiter.penalize(host, delay)
+            else:
+                time.sleep(delay)
+        finally:
+            if host:
+                metrics.observe("http_request_seconds", time.perf_counter() - start, host=host)
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Returns the process-wide rate limiter, creating an in-memory one on first use."""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter()
+        return _shared_limiter
+
+
+def set_rate_limiter(rate_limiter):
+    """Replaces the process-wide rate limiter, e.g. with one sharing state across processes."""
+    global _shared_limiter
+    with _shared_lock:
+        _shared_limiter = rate_limiter
@@ -0,0 +1,80 @@
+# paper_fetcher/registry.py
+import importlib
+
+# Fetcher of each platform as "module:Class". Modules are imported on first use, so selecting
+# a platform only loads that fetcher's dependencies (e.g. ``scholarly`` only for Google Scholar).
+PLATFORMS = {
+    "pubmed": ".pubmed_fetcher:PubMedFetcher",
+    "arxiv": ".arxiv_fetcher:ArXivFetcher",
+    "google_scholar": ".google_scholar_fetcher:GoogleScholarFetcher",
+    "crossref": ".crossref_fetcher:CrossRefFetcher",
+}
+
+
+def get_fetcher_class(platform):
+    """
+    Imports and returns the fetcher class of a platform.
+
+    Args:
+        platform (str): Platform name, a key of ``PLATFORMS``.
+
+    Returns:
+        type: The ``AbstractPaperFetcher`` subclass of the platform.
+    """
+    module_name, class_name = PLATFORMS[platform].split(":")
+    return getattr(importlib.import_module(module_name, __package__), class_name)
+
+
+def parse_platforms(value):
+    """
+    Parses a platform selection: a single name, a comma-separated list, or 'all'.
+
+    Args:
+        value (str): Platform selection from the command line or a config file.
+
+    Returns:
+        list: Selected platform names, in the given order and without repeats.
+    """
+    if value.strip() == "all":
+        return list(PLATFORMS)
+    platforms = []
+    for name in value.split(","):
+        name = name.strip()
+        if name not in PLATFORMS:
+            raise ValueError(f"Unsupported platform: {name}")
+        if name not in platforms:
+            platforms.append(name)
+    return platforms
+
+
+def create_fetcher(platform, json_file_name, platform_options=None, split=False, split_workers=4, **kwargs):
+    """
+    Creates a fetcher for a platform selection.
+
+    Args:
+        platform (str): Platform selection, see ``parse_platforms``.
+        json_file_name (str): Name of the results file.
+        platform_options (dict, optional): Extra constructor arguments for specific platforms,
+            keyed by platform name. Defaults to None.
+        split (bool, optional): If True, searches are split into date slices fetched in
+            parallel, see ``QueryPlanner``. Requires a single platform. Defaults to False.
+        split_workers (int, optional): Number of slices fetched at once when splitting.
+        **kwargs: Extra arguments passed to the fetcher constructor.
+
+    Returns:
+        AbstractPaperFetcher: A single-platform fetcher, a ``PlannedFetcher`` when splitting,
+        or a ``MultiPlatformFetcher`` when several platforms are selected.
+    """
+    platforms = parse_platforms(platform)
+    platform_options = platform_options or {}
+    if split:
+        if len(platforms) != 1:
+            raise ValueError("Splitting searches requires a single platform")
+        from .planner import PlannedFetcher
+        return PlannedFetcher(json_file_name, platforms[0], workers=split_workers,
+                              platform_options=platform_options, **kwargs)
+    if len(platforms) == 1:
+        fetcher_class = get_fetcher_class(platforms[0])
+        return fetcher_class(json_file_name, **platform_options.get(platforms[0], {}), **kwargs)
+    from .multi_fetcher import MultiPlatformFetcher
+    return MultiPlatformFetcher(json_file_name, platforms, platform_options=platform_options, **kwargs)
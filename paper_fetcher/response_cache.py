@@ -0,0 +1,199 @@
+# paper_fetcher/response_cache.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DAY = 24 * 3600
+
+# Time to live in seconds, by host or host + path prefix; the longest matching prefix wins.
+# A TTL of 0 disables caching: live search pages carry cursors and history sessions that
+# expire server-side within minutes, so replaying them later truncates paging. Only
+# immutable record fetches are cached.
+DEFAULT_TTLS = {
+    "eutils.ncbi.nlm.nih.gov": 0,                                     # esearch result lists
+    "eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi": 30 * DAY,    # article records
+    "export.arxiv.org": 0,                                            # search pages
+    "api.crossref.org": 0,                                            # search pages
+    "api.crossref.org/works/": 7 * DAY,                               # single works, also per enriched DOI
+}
+
+# Parameters that do not change the response and must not split cache entries.
+IGNORED_PARAMS = {"api_key", "mailto"}
+
+# Response headers kept with a cached body (which is stored decoded).
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class ResponseCache:
+    """
+    On-disk cache of raw API responses, stored in SQLite and keyed by the normalized
+    method, URL and parameters.
+
+    Entries expire after a per-host (or per-path) TTL; expired entries with an ``ETag``
+    or ``Last-Modified`` header are revalidated with a conditional request instead of
+    being downloaded again. When the stored bodies exceed ``max_bytes``, the least
+    recently used entries are evicted.
+
+    Attributes:
+        file_path (str): Path to the SQLite cache file.
+        ttls (dict): Time to live in seconds by host or host + path prefix.
+        max_bytes (int): Size cap of the stored bodies.
+        hits (int): Requests served from a fresh entry.
+        revalidated (int): Requests served from an entry after a 304 answer.
+        misses (int): Requests that had to be downloaded.
+    """
+
+    def __init__(self, file_path, ttls=None, max_bytes=512 * 1024 * 1024, default_ttl=3600):
+        self.file_path = file_path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits = self.revalidated = self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(file_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, body BLOB,"
+                " size INTEGER, stored_at REAL, accessed_at REAL)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(method, url, params=None, data=None):
+        """
+        Builds the cache key of a request from its method, normalized URL and sorted
+        query/form parameters.
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        parts = urlsplit(url)
+        fields = dict(params or {}, **(data or {}))
+        query = urlencode(sorted((name, str(value)) for name, value in fields.items()
+                                 if name not in IGNORED_PARAMS))
+        normalized = f"{method.upper()} {parts.scheme.lower()}://{parts.netloc.lower()}{parts.path}?{parts.query}&{query}"
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, url):
+        """Returns the time to live of responses for a URL."""
+        parts = urlsplit(url)
+        target = f"{(parts.hostname or '').lower()}{parts.path}"
+        matches = [prefix for prefix in self.ttls if target.startswith(prefix)]
+        return self.ttls[max(matches, key=len)] if matches else self.default_ttl
+
+    def lookup(self, key):
+        """
+        Returns the entry stored for a key, or None.
+
+        Returns:
+            dict: Entry with ``status``, ``headers``, ``body``, ``stored_at`` and ``url``.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, body, stored_at FROM responses WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                                   (time.time(), key))
+        url, status, headers, body, stored_at = row
+        return {"url": url, "status": status, "headers": json.loads(headers),
+                "body": body, "stored_at": stored_at}
+
+    def is_cacheable(self, url):
+        """Checks whether responses for a URL are cached at all, i.e. have a positive TTL."""
+        return self.ttl_for(url) > 0
+
+    def is_fresh(self, entry):
+        """Checks whether an entry is younger than the TTL of its URL."""
+        return time.time() - entry["stored_at"] < self.ttl_for(entry["url"])
+
+    def store(self, key, url, status, headers, body):
+        """
+        Stores a response body, evicting least recently used entries beyond the size cap.
+
+        Args:
+            key (str): Cache key, see ``make_key``.
+            url (str): Request URL, used to pick the TTL.
+            status (int): HTTP status code.
+            headers (Mapping): Response headers; only validators and content type are kept.
+            body (bytes): Decoded response body.
+        """
+        kept = {name: headers[name] for name in STORED_HEADERS if name in headers}
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, url, status, json.dumps(kept), body, len(body), now, now))
+            self._total_bytes += len(body) - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def touch(self, key):
+        """Marks an entry as fresh again after a successful revalidation."""
+        with self._lock:
+            with self._conn:
+                now = time.time()
+                self._conn.execute(
+                    "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+
+    def _evict(self):
+        """Deletes least recently used entries until the cache is 10% under its size cap."""
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        total = sum(size for _, size in rows)
+        evicted = []
+        for key, size in rows:
+            if total <= target:
+                break
+            evicted.append((key,))
+            total -= size
+        with self._conn:
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self._total_bytes = total
+
+    def conditional_headers(self, entry):
+        """Returns the ``If-None-Match``/``If-Modified-Since`` headers to revalidate an entry."""
+        headers = {}
+        if "ETag" in entry["headers"]:
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if "Last-Modified" in entry["headers"]:
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    def to_response(self, entry):
+        """Builds a ``requests.Response`` from a cached entry."""
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.url = entry["url"]
+        response.headers = CaseInsensitiveDict(entry["headers"], **{"X-Cache": "HIT"})
+        response._content = entry["body"]
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or 'utf-8'
+        return response
+
+    def record(self, outcome):
+        """Increments the ``hits``, ``revalidated`` or ``misses`` counter."""
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self):
+        """Returns hit/miss counters and the size of the stored bodies."""
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses,
+                "bytes": self._total_bytes}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
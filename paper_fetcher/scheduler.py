@@ -0,0 +1,317 @@
+# paper_fetcher/scheduler.py
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import schedule
+
+from .registry import create_fetcher, parse_platforms
+
+# Maximum number of jobs running at once against each platform.
+DEFAULT_PLATFORM_LIMITS = {
+    "pubmed": 2,
+    "arxiv": 1,
+    "google_scholar": 1,
+    "crossref": 2,
+}
+DEFAULT_PLATFORM_LIMIT = 2
+
+# Status codes of ``AbstractPaperFetcher.execute``.
+OUTCOMES = {0: "new_papers", 1: "no_new_papers", 2: "error"}
+
+
+class PlatformSlots:
+    """
+    Numbers of running jobs per platform, checked against the platform concurrency limits
+    before a job is handed to a worker, so a job waiting for a platform never holds a worker.
+
+    A job takes the slots of all its platforms at once or none, so multi-platform jobs
+    cannot deadlock. Not thread-safe: callers serialize access.
+
+    Attributes:
+        limits (dict): Maximum number of jobs running at once per platform.
+        running (dict): Number of running jobs per platform.
+    """
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.running = {}
+
+    def try_acquire(self, platforms):
+        """Takes a slot of every platform and returns True, or returns False if one is full."""
+        if any(self.running.get(platform, 0) >= self.limits.get(platform, DEFAULT_PLATFORM_LIMIT)
+               for platform in platforms):
+            return False
+        for platform in platforms:
+            self.running[platform] = self.running.get(platform, 0) + 1
+        return True
+
+    def release(self, platforms):
+        for platform in platforms:
+            self.running[platform] -= 1
+
+
+class ScheduledJob:
+    """
+    A saved query run periodically by the scheduler, either every ``every_minutes`` minutes
+    or every day at ``at`` (``'HH:MM'``).
+
+    The job keeps its fetcher between runs, so the storage cache, dedup index and HTTP
+    connections stay warm.
+
+    Attributes:
+        name (str): Unique job name, used in logs and in the report.
+        platform (str): Platform selection, see ``parse_platforms``.
+        platforms (list): Platforms the job queries.
+        search_params (dict): Search conditions.
+        json_file_name (str): Name of the results file.
+        max_results (int): Maximum number of papers fetched per run.
+        incremental (bool): Whether runs only fetch papers newer than the last one.
+        every_minutes (float, optional): Interval between runs.
+        at (str, optional): Daily run time.
+        storage (str, optional): Storage backend name.
+        options (dict): Extra fetcher constructor arguments keyed by platform.
+        fetcher (AbstractPaperFetcher): Fetcher created on the first run.
+        running (bool): Whether a run is in progress or waiting for a platform slot.
+        runs (int): Number of finished runs.
+        outcomes (dict): Number of runs per outcome.
+        last_run (float): Start time of the last finished run.
+        last_duration (float): Duration in seconds of the last finished run.
+        last_outcome (str): Outcome of the last finished run.
+        total_duration (float): Cumulated duration of all runs.
+    """
+
+    def __init__(self, name, platform, search_params, json_file_name=None, max_results=10,
+                 incremental=False, every_minutes=None, at=None, storage=None, options=None):
+        if not every_minutes and not at:
+            raise ValueError(f"Job {name!r} needs 'every_minutes' or 'at'")
+        self.name = name
+        self.platform = platform
+        self.platforms = parse_platforms(platform)
+        self.search_params = search_params
+        self.json_file_name = json_file_name or f"{name}.json"
+        self.max_results = max_results
+        self.incremental = incremental
+        self.every_minutes = every_minutes
+        self.at = at
+        self.storage = storage
+        self.options = options or {}
+        self.fetcher = None
+        self.running = False
+        self.runs = 0
+        self.outcomes = {outcome: 0 for outcome in OUTCOMES.values()}
+        self.last_run = self.last_duration = self.last_outcome = None
+        self.total_duration = 0.0
+
+    @classmethod
+    def from_dict(cls, config):
+        """Creates a job from an entry of the ``jobs`` list of a scheduler config file."""
+        config = dict(config)
+        return cls(config.pop("name"), config.pop("platform"), config.pop("search_params"), **config)
+
+    def get_fetcher(self):
+        """Returns the job's fetcher, creating it on the first run."""
+        if self.fetcher is None:
+            self.fetcher = create_fetcher(self.platform, self.json_file_name,
+                                          platform_options=self.options, storage=self.storage)
+        return self.fetcher
+
+    def record(self, started, duration, code):
+        """Records the outcome of a finished run."""
+        self.runs += 1
+        self.last_run = started
+        self.last_duration = duration
+        self.last_outcome = OUTCOMES[code]
+        self.outcomes[self.last_outcome] += 1
+        self.total_duration += duration
+
+    def report(self):
+        """Returns the job's run statistics."""
+        return {
+            "platform": self.platform,
+            "json_file_name": self.json_file_name,
+            "runs": self.runs,
+            "outcomes": dict(self.outcomes),
+            "last_run": self.last_run,
+            "last_duration": self.last_duration,
+            "last_outcome": self.last_outcome,
+            "mean_duration": self.total_duration / self.runs if self.runs else None,
+            "running": self.running,
+        }
+
+
+class FetchScheduler:
+    """
+    Long-running daemon executing many saved queries in one process.
+
+    Due jobs are handed to a pool of ``workers`` threads. Each platform additionally has a
+    concurrency limit, so e.g. only one Google Scholar job runs at a time however many are
+    due: a due job whose platform is busy waits in a queue, without holding a worker, and is
+    started in due order as soon as a slot frees up. A job that is still running or waiting
+    when it becomes due again is skipped for that turn.
+    After every run, per-job durations and outcomes are logged and written to ``report_path``.
+
+    Attributes:
+        jobs (list): Scheduled jobs.
+        workers (int): Maximum number of jobs running at once.
+        platform_limits (dict): Maximum number of jobs running at once per platform.
+        report_path (str, optional): JSON file receiving the per-job report after every run.
+        scheduler (schedule.Scheduler): Scheduler deciding when jobs are due.
+    """
+
+    def __init__(self, jobs, workers=4, platform_limits=None, report_path=None):
+        names = [job.name for job in jobs]
+        if len(set(names)) != len(names):
+            raise ValueError("Job names must be unique")
+        self.jobs = jobs
+        self.workers = workers
+        self.platform_limits = dict(DEFAULT_PLATFORM_LIMITS, **(platform_limits or {}))
+        self.report_path = report_path
+        self.scheduler = schedule.Scheduler()
+        self._slots = PlatformSlots(self.platform_limits)
+        self._waiting = deque()
+        self._active = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+
+    @classmethod
+    def from_config(cls, config_path):
+        """
+        Creates a scheduler from a JSON config file such as::
+
+            {
+                "workers": 4,
+                "platform_limits": {"pubmed": 2},
+                "report": "results/scheduler_report.json",
+                "jobs": [
+                    {"name": "ml-pubmed", "platform": "pubmed",
+                     "search_params": {"keyword": "machine learning"},
+                     "max_results": 200, "incremental": true, "every_minutes": 30},
+                    {"name": "ml-arxiv", "platform": "arxiv", "json_file_name": "ml.jsonl",
+                     "search_params": {"keyword": "machine learning"}, "at": "06:00"}
+                ]
+            }
+
+        Args:
+            config_path (str): Path to the config file.
+
+        Returns:
+            FetchScheduler: The configured scheduler.
+        """
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        jobs = [ScheduledJob.from_dict(job) for job in config.get("jobs", [])]
+        return cls(jobs, workers=config.get("workers", 4),
+                   platform_limits=config.get("platform_limits"),
+                   report_path=config.get("report", os.path.join("results", "scheduler_report.json")))
+
+    def submit(self, job):
+        """Queues a run of a job, unless it is already running or waiting."""
+        with self._lock:
+            if job.running:
+                logging.warning(f"Job {job.name} is still running, skipping this turn")
+                return
+            job.running = True
+            self._waiting.append(job)
+            self._dispatch()
+
+    def _dispatch(self):
+        # Called with the lock held: starts the waiting jobs that have a free worker and
+        # free platform slots, oldest first.
+        for job in list(self._waiting):
+            if self._active >= self.workers or self._stopped.is_set():
+                return
+            if self._slots.try_acquire(job.platforms):
+                self._waiting.remove(job)
+                self._active += 1
+                self._executor.submit(self._run_job, job)
+
+    def _run_job(self, job):
+        started = time.time()
+        try:
+            logging.info(f"Job {job.name} started")
+            code = job.get_fetcher().execute(job.search_params, job.max_results, job.incremental)
+        except Exception as e:
+            logging.error(f"Job {job.name} failed: {e}")
+            code = 2
+        duration = time.time() - started
+        with self._lock:
+            job.record(started, duration, code)
+            job.running = False
+            self._slots.release(job.platforms)
+            self._active -= 1
+            self._dispatch()
+        logging.info(f"Job {job.name} finished in {duration:.1f}s: {OUTCOMES[code]} "
+                     f"(run {job.runs}, mean {job.total_duration / job.runs:.1f}s)")
+        self.write_report()
+
+    def report(self):
+        """Returns the run statistics of every job, keyed by job name."""
+        with self._lock:
+            return {job.name: job.report() for job in self.jobs}
+
+    def write_report(self):
+        """Writes the per-job report to ``report_path``, if set."""
+        if not self.report_path:
+            return
+        report = {"updated": time.time(), "jobs": self.report()}
+        with self._lock:
+            os.makedirs(os.path.dirname(self.report_path) or ".", exist_ok=True)
+            tmp_path = f"{self.report_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.report_path)
+
+    def start(self, run_now=True):
+        """
+        Registers the jobs with the scheduler.
+
+        Args:
+            run_now (bool, optional): If True, every job also runs once immediately.
+                Defaults to True.
+        """
+        for job in self.jobs:
+            if job.every_minutes:
+                self.scheduler.every(job.every_minutes).minutes.do(self.submit, job)
+            else:
+                self.scheduler.every().day.at(job.at).do(self.submit, job)
+            if run_now:
+                self.submit(job)
+        logging.info(f"Scheduled {len(self.jobs)} jobs on {self.workers} workers")
+
+    def run_forever(self, run_now=True, poll_interval=1.0):
+        """
+        Runs due jobs until ``stop`` is called or the process is interrupted, then waits for
+        the running jobs to finish.
+
+        Args:
+            run_now (bool, optional): If True, every job also runs once at startup. Defaults to True.
+            poll_interval (float, optional): Seconds between checks for due jobs. Defaults to 1.
+        """
+        self.start(run_now)
+        try:
+            while not self._stopped.wait(poll_interval):
+                self.scheduler.run_pending()
+        except KeyboardInterrupt:
+            logging.info("Interrupted, waiting for running jobs to finish...")
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        """Makes ``run_forever`` return after the running jobs finish."""
+        self._stopped.set()
+
+    def shutdown(self):
+        self._stopped.set()
+        self.scheduler.clear()
+        with self._lock:
+            for job in self._waiting:
+                job.running = False
+            self._waiting.clear()
+        self._executor.shutdown(wait=True)
+        self.write_report()
@@ -0,0 +1,442 @@
+# paper_fetcher/storage.py
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+from filelock import FileLock
+
+from .dedup import paper_ids
+from .paper import Paper
+
+
+ISSN_RE = re.compile(r'\b\d{4}-?\d{3}[\dxX]\b')
+
+
+def normalize_issn(issn):
+    """Normalizes an ISSN to its hyphenated upper-case form, e.g. ``'1234-567X'``."""
+    issn = issn.strip().replace('-', '').upper()
+    return f"{issn[:4]}-{issn[4:]}"
+
+
+def write_json_array(f, records):
+    """
+    Writes papers to a file as a JSON array, one record at a time, in the layout of
+    ``json.dump(records, indent=4)``.
+
+    Returns:
+        int: Number of written records.
+    """
+    count = 0
+    f.write('[')
+    for record in records:
+        body = json.dumps(Paper.coerce(record).to_dict(), ensure_ascii=False, indent=4).replace('\n', '\n    ')
+        f.write(('\n    ' if count == 0 else ',\n    ') + body)
+        count += 1
+    f.write('\n]' if count else ']')
+    return count
+
+
+class BaseStorage(ABC):
+    """
+    Abstract storage backend for fetched papers. Backends yield ``Paper`` records and accept
+    papers or plain dict records.
+
+    Attributes:
+        file_path (str): Path of the file backing the storage.
+        lock (FileLock): Inter-process lock guarding the file.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = FileLock(f"{file_path}.lock")
+
+    def stamp(self):
+        """
+        Identifies the current version of the stored data, so derived indexes can detect that
+        the file was replaced, deleted or changed behind their back.
+
+        Returns:
+            tuple: A value that changes with the stored data, or None if the file does not exist.
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        # ``os.replace`` changes at least the inode.
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        """Loads all stored records into a list."""
+        return list(self.iter_records())
+
+    def export_json(self, dest_path):
+        """
+        Exports the stored records as a JSON array, streaming one record at a time.
+
+        The output matches the layout of ``json.dump(records, indent=4)``.
+
+        Args:
+            dest_path (str): Path of the JSON file to write.
+
+        Returns:
+            int: Number of exported records.
+        """
+        with open(dest_path, 'w', encoding='utf-8') as f:
+            return write_json_array(f, self.iter_records())
+
+    @abstractmethod
+    def iter_records(self):
+        """Yields stored papers one by one."""
+        pass
+
+    @abstractmethod
+    def save(self, records):
+        """
+        Persists new records.
+
+        Args:
+            records (list): Records to be added to the storage.
+        """
+        pass
+
+    @abstractmethod
+    def rewrite(self, records):
+        """
+        Atomically replaces all stored records, e.g. after enriching them. ``records`` may be
+        a generator reading from this storage.
+
+        Args:
+            records (iterable): Records to store instead of the current ones.
+        """
+        pass
+
+
+class JSONStorage(BaseStorage):
+    """
+    Stores papers as a single JSON array, rewritten in full on every save.
+
+    Several processes may save to the same file: each save merges the new records into the
+    array currently on disk under the file lock, reloading the in-memory copy first if
+    another writer replaced the file since it was read, and swaps the new array in
+    atomically, so no writer drops another's records and readers never see a partial file.
+
+    Attributes:
+        cache_enabled (bool): Whether to keep the stored records in memory.
+    """
+
+    def __init__(self, file_path, cache_enabled=True):
+        super().__init__(file_path)
+        self.cache_enabled = cache_enabled
+        self._cache = None
+        self._stamp = None
+
+    @property
+    def cache(self):
+        """
+        In-memory copy of the stored papers if caching is enabled, loaded on first use and
+        reloaded when another writer has replaced the file since.
+        """
+        if not self.cache_enabled:
+            return []
+        if self._cache is None or self._stamp != self.stamp():
+            with self.lock:
+                self._stamp = self.stamp()
+                self._cache = self._read_file()
+        return self._cache
+
+    def _read_file(self):
+        """Loads the JSON array from disk, if available, ensuring file locking."""
+        with self.lock:
+            if os.path.exists(self.file_path):
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    return [Paper.from_dict(record) for record in json.load(f)]
+        return []
+
+    def iter_records(self):
+        yield from (self.cache if self.cache_enabled else self._read_file())
+
+    def save(self, records):
+        records = [Paper.coerce(record) for record in records]
+        with self.lock:
+            # Merge into the array on disk, which other processes may have extended.
+            data_to_write = self.cache if self.cache_enabled else self._read_file()
+            data_to_write.extend(records)
+            self._write_file(data_to_write)
+
+    def _write_file(self, records):
+        """Replaces the file atomically with a JSON array of ``records``; the lock must be held."""
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            write_json_array(f, records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.file_path)
+        self._stamp = self.stamp()
+
+    def rewrite(self, records):
+        with self.lock:
+            self._write_file(records)
+            self._cache = None
+
+
+class JSONLinesStorage(BaseStorage):
+    """
+    Stores papers as JSON Lines. Saves append only the new records with a single
+    fsync, and reads stream the file without loading it into memory.
+    """
+
+    def iter_records(self):
+        if not os.path.exists(self.file_path):
+            return
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                # A line without a newline is a record still being appended by a writer.
+                if line.endswith('\n') and line.strip():
+                    yield Paper.from_dict(json.loads(line))
+
+    def save(self, records):
+        if not records:
+            return
+        payload = ''.join(json.dumps(Paper.coerce(record).to_dict(), ensure_ascii=False) + '\n'
+                          for record in records)
+        with self.lock:
+            with open(self.file_path, 'a', encoding='utf-8') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def rewrite(self, records):
+        tmp_path = f"{self.file_path}.tmp"
+        with self.lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(Paper.coerce(record).to_dict(), ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.file_path)
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    Stores papers in a SQLite database so the corpus can be filtered without parsing it.
+
+    Each paper is one row of the ``papers`` table, which keeps the full record as JSON next
+    to normalized columns: unique DOI, PMID and arXiv id keys (a record whose identifier is
+    already stored is skipped), and indexed year and journal. ISSNs go to an indexed
+    ``paper_issns`` table, and title and abstract to the ``papers_fts`` FTS5 index when the
+    SQLite build supports it. Each save is a single transaction.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS papers ("
+        " id INTEGER PRIMARY KEY, doi TEXT UNIQUE, pmid TEXT UNIQUE, arxiv_id TEXT UNIQUE,"
+        " title TEXT, abstract TEXT, year INTEGER, journal TEXT COLLATE NOCASE, record TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS papers_year ON papers (year)",
+        "CREATE INDEX IF NOT EXISTS papers_journal ON papers (journal)",
+        "CREATE TABLE IF NOT EXISTS paper_issns ("
+        " paper_id INTEGER NOT NULL REFERENCES papers (id) ON DELETE CASCADE,"
+        " issn TEXT NOT NULL, PRIMARY KEY (issn, paper_id))",
+    )
+    FTS_SCHEMA = (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5("
+        " title, abstract, content='papers', content_rowid='id')",
+        "CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN"
+        " INSERT INTO papers_fts (rowid, title, abstract) VALUES (new.id, new.title, new.abstract); END",
+        "CREATE TRIGGER IF NOT EXISTS papers_fts_delete AFTER DELETE ON papers BEGIN"
+        " INSERT INTO papers_fts (papers_fts, rowid, title, abstract)"
+        " VALUES ('delete', old.id, old.title, old.abstract); END",
+    )
+
+    def __init__(self, file_path):
+        super().__init__(file_path)
+        self._conn = None
+        self._lock = threading.Lock()
+        self.has_fts = False
+
+    def _connection(self):
+        """Opens the database on first use, creating the schema if needed."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.file_path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                for statement in self.SCHEMA:
+                    self._conn.execute(statement)
+                try:
+                    for statement in self.FTS_SCHEMA:
+                        self._conn.execute(statement)
+                    self.has_fts = True
+                except sqlite3.OperationalError as e:
+                    logging.warning(f"Full-text search unavailable, falling back to LIKE: {e}")
+        return self._conn
+
+    def stamp(self):
+        # Writes land in the write-ahead log first, so the main file's size and mtime lag behind.
+        if not os.path.exists(self.file_path):
+            return None
+        with self._lock:
+            max_id = self._connection().execute("SELECT MAX(id) FROM papers").fetchone()[0]
+        return os.stat(self.file_path).st_ino, max_id
+
+    @staticmethod
+    def _row(paper):
+        """Returns the column values of a paper."""
+        doi, arxiv_id, pmid = paper_ids(paper)
+        return (doi, pmid, arxiv_id, paper.title, paper.abstract, paper.year, paper.journal,
+                json.dumps(paper.to_dict(), ensure_ascii=False))
+
+    @staticmethod
+    def _issns(paper):
+        """Returns the ISSNs of a paper in their hyphenated upper-case form."""
+        return {normalize_issn(issn) for issn in ISSN_RE.findall(paper.issn or '')}
+
+    def iter_records(self):
+        yield from self.query()
+
+    def save(self, records):
+        if not records:
+            return
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                for record in map(Paper.coerce, records):
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO papers (doi, pmid, arxiv_id, title, abstract, year, journal, record)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._row(record))
+                    if cursor.rowcount:
+                        conn.executemany("INSERT OR IGNORE INTO paper_issns (paper_id, issn) VALUES (?, ?)",
+                                         ((cursor.lastrowid, issn) for issn in self._issns(record)))
+
+    def rewrite(self, records):
+        # Build the new contents in a scratch database, then swap them in with one transaction
+        # so readers and other processes never see a partial corpus.
+        tmp = SQLiteStorage(f"{self.file_path}.tmp")
+        if os.path.exists(tmp.file_path):
+            os.remove(tmp.file_path)
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= 1000:
+                tmp.save(batch)
+                batch = []
+        tmp.save(batch)
+        tmp._connection()
+        tmp.close()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("ATTACH DATABASE ? AS scratch", (tmp.file_path,))
+            try:
+                with conn:
+                    conn.execute("DELETE FROM paper_issns")
+                    conn.execute("DELETE FROM papers")
+                    conn.execute("INSERT INTO papers SELECT * FROM scratch.papers")
+                    conn.execute("INSERT INTO paper_issns SELECT * FROM scratch.paper_issns")
+            finally:
+                conn.execute("DETACH DATABASE scratch")
+        os.remove(tmp.file_path)
+
+    def query(self, journal=None, issn=None, year_from=None, year_to=None, has_doi=False,
+              text=None, limit=None):
+        """
+        Yields the stored papers matching every given filter, in insertion order (or by
+        relevance when searching text).
+
+        Args:
+            journal (str, optional): Journal name, matched case-insensitively.
+            issn (str, optional): ISSN of the journal.
+            year_from (int, optional): Earliest publication year.
+            year_to (int, optional): Latest publication year.
+            has_doi (bool, optional): Only papers with a DOI.
+            text (str, optional): FTS5 query over title and abstract, such as
+                ``'"deep learning" AND cancer'``; a plain substring if FTS5 is unavailable.
+            limit (int, optional): Maximum number of papers.
+
+        Yields:
+            Paper: Matching papers.
+        """
+        if not os.path.exists(self.file_path) and self._conn is None:
+            return
+        joins, conditions, params = [], [], []
+        order = "p.id"
+        if journal:
+            conditions.append("p.journal = ?")
+            params.append(journal)
+        if issn:
+            joins.append("JOIN paper_issns i ON i.paper_id = p.id")
+            conditions.append("i.issn = ?")
+            params.append(normalize_issn(issn))
+        if year_from is not None:
+            conditions.append("p.year >= ?")
+            params.append(int(year_from))
+        if year_to is not None:
+            conditions.append("p.year <= ?")
+            params.append(int(year_to))
+        if has_doi:
+            conditions.append("p.doi IS NOT NULL")
+        with self._lock:
+            conn = self._connection()
+        if text and self.has_fts:
+            joins.append("JOIN papers_fts f ON f.rowid = p.id")
+            conditions.append("papers_fts MATCH ?")
+            params.append(text)
+            order = "f.rank"
+        elif text:
+            conditions.append("(p.title LIKE ? OR p.abstract LIKE ?)")
+            params.extend([f"%{text}%"] * 2)
+        sql = f"SELECT p.record FROM papers p {' '.join(joins)}"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        for (record,) in conn.execute(sql, params):
+            yield Paper.from_dict(json.loads(record))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+STORAGE_BACKENDS = {
+    "json": JSONStorage,
+    "jsonl": JSONLinesStorage,
+    "sqlite": SQLiteStorage,
+}
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+def create_storage(file_path, storage=None, cache_enabled=True):
+    """
+    Creates the storage backend for a results file.
+
+    Args:
+        file_path (str): Path of the results file.
+        storage (str or BaseStorage, optional): Backend name ('json', 'jsonl' or 'sqlite') or a
+            ready storage instance. Defaults to None, which picks the backend from the file extension.
+        cache_enabled (bool, optional): Whether the JSON backend keeps records in memory.
+
+    Returns:
+        BaseStorage: The storage backend.
+    """
+    if isinstance(storage, BaseStorage):
+        return storage
+    if storage is None:
+        if file_path.endswith(".jsonl"):
+            storage = "jsonl"
+        elif file_path.endswith(SQLITE_EXTENSIONS):
+            storage = "sqlite"
+        else:
+            storage = "json"
+    if storage not in STORAGE_BACKENDS:
+        raise ValueError(f"Unsupported storage backend: {storage}")
+    if storage == "json":
+        return JSONStorage(file_path, cache_enabled=cache_enabled)
+    return STORAGE_BACKENDS[storage](file_path)
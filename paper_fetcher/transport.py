@@ -0,0 +1,235 @@
+# paper_fetcher/transport.py
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics import get_metrics
+from .rate_limit import backoff_delay, get_rate_limiter, host_of, parse_retry_after
+
+# (connect, read) timeouts in seconds applied to every request.
+DEFAULT_TIMEOUT = (5, 30)
+
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "paper-fetcher (+https://github.com/HowieHsu0126/RMS)",
+}
+
+# Maximum number of in-flight requests per host.
+DEFAULT_HOST_LIMITS = {
+    "eutils.ncbi.nlm.nih.gov": 3,
+    "export.arxiv.org": 1,
+    "api.crossref.org": 5,
+}
+DEFAULT_HOST_LIMIT = 4
+
+# Responses retried with backoff; 429 and 503 also honor Retry-After.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class Transport:
+    """
+    HTTP transport shared by all fetchers. Provides a pooled keep-alive session with
+    uniform timeouts and gzip, per-host connection limits, and helpers to run requests
+    concurrently either on a thread pool or from asyncio code.
+
+    Every request first takes a token from the host's rate limiter, and its latency, status,
+    size and retries are recorded in the shared ``Metrics``. Throttled (429/503),
+    server-error and connection-failure responses are retried per request with jittered
+    exponential backoff, honoring ``Retry-After`` when the server sends it.
+
+    With a ``ResponseCache``, GET requests are served from the cache while fresh and
+    revalidated with conditional requests once expired.
+
+    Attributes:
+        session (requests.Session): Pooled session used for every request.
+        timeout (tuple): Default (connect, read) timeout.
+        host_limits (dict): Maximum in-flight requests per host.
+        max_retries (int): Maximum number of retries per request.
+        cache (ResponseCache, optional): Cache for GET responses.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, host_limits=None, max_workers=16,
+                 rate_limiter=None, max_retries=5, cache=None):
+        self.timeout = timeout
+        self.cache = cache
+        self.max_retries = max_retries
+        self._rate_limiter = rate_limiter
+        self.host_limits = dict(DEFAULT_HOST_LIMITS, **(host_limits or {}))
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=len(self.host_limits) + 4, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._semaphores = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def rate_limiter(self):
+        """Rate limiter applied to every request; the shared limiter unless one was given."""
+        return self._rate_limiter or get_rate_limiter()
+
+    def _host_semaphore(self, url):
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            if host not in self._semaphores:
+                limit = self.host_limits.get(host, DEFAULT_HOST_LIMIT)
+                self._semaphores[host] = threading.BoundedSemaphore(limit)
+            return self._semaphores[host]
+
+    @property
+    def executor(self):
+        """Thread pool used by ``map`` and the async helpers, created on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="transport")
+            return self._executor
+
+    def request(self, method, url, params=None, data=None, timeout=None, use_cache=True, **kwargs):
+        """
+        Sends a request on the pooled session, within the per-host connection and rate
+        limits, retrying throttled and failed attempts. GET requests go through the
+        response cache, if there is one and the URL has a positive TTL.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            params (dict, optional): Query string parameters.
+            data (dict, optional): Form body.
+            timeout (float or tuple, optional): Overrides the default timeout.
+            use_cache (bool, optional): Set to False to bypass the response cache, e.g. for
+                paged search requests whose cursors expire server-side.
+
+        Returns:
+            requests.Response: The response; after the last retry, possibly an error response.
+        """
+        cache = self.cache if use_cache and method == "GET" else None
+        if cache is None or not cache.is_cacheable(url):
+            return self._send(method, url, params, data, timeout, **kwargs)
+
+        metrics = get_metrics()
+        host = host_of(url)
+        key = cache.make_key(method, url, params, data)
+        entry = cache.lookup(key)
+        if entry is not None and cache.is_fresh(entry):
+            cache.record("hits")
+            metrics.inc("http_cache_total", host=host, result="hits")
+            return cache.to_response(entry)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            headers.update(cache.conditional_headers(entry))
+        response = self._send(method, url, params, data, timeout, headers=headers, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            cache.touch(key)
+            cache.record("revalidated")
+            metrics.inc("http_cache_total", host=host, result="revalidated")
+            return cache.to_response(entry)
+        cache.record("misses")
+        metrics.inc("http_cache_total", host=host, result="misses")
+        if response.status_code == 200:
+            cache.store(key, url, response.status_code, response.headers, response.content)
+        return response
+
+    def _send(self, method, url, params, data, timeout, **kwargs):
+        """Sends a request over the network, retrying throttled and failed attempts."""
+        limiter = self.rate_limiter
+        metrics = get_metrics()
+        host = host_of(url)
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire(url)
+            try:
+                with self._host_semaphore(url), metrics.timer("http_request_seconds", host=host):
+                    response = self.session.request(method, url, params=params, data=data,
+                                                    timeout=timeout or self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.inc("http_requests_total", host=host, status=type(e).__name__)
+                if attempt == self.max_retries:
+                    raise
+                metrics.inc("http_retries_total", host=host, reason=type(e).__name__)
+                delay = backoff_delay(attempt)
+                logging.warning(f"Request to {url} failed: {e}. Retrying in {delay:.1f} seconds...")
+                time.sleep(delay)
+                continue
+
+            metrics.inc("http_requests_total", host=host, status=response.status_code)
+            metrics.inc("http_response_bytes_total", len(response.content), host=host)
+            if response.status_code in (429, 503):
+                metrics.inc("http_throttled_total", host=host)
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            metrics.inc("http_retries_total", host=host, reason=response.status_code)
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = backoff_delay(attempt)
+            logging.warning(f"{url} answered {response.status_code}, "
+                            f"retrying in {delay:.1f} seconds...")
+            # Pause the whole host so concurrent callers back off as well.
+            limiter.penalize(url, delay)
+
+    def get(self, url, params=None, **kwargs):
+        return self.request("GET", url, params=params, **kwargs)
+
+    def post(self, url, data=None, **kwargs):
+        return self.request("POST", url, data=data, **kwargs)
+
+    def map(self, func, items):
+        """
+        Applies ``func`` to every item concurrently on the transport thread pool.
+
+        Args:
+            func (callable): Function issuing requests through this transport.
+            items (iterable): Arguments for ``func``.
+
+        Returns:
+            list: Results in the order of ``items``.
+        """
+        items = list(items)
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        return list(self.executor.map(func, items))
+
+    async def arequest(self, method, url, **kwargs):
+        """Async counterpart of ``request``; the call runs on the transport thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(self.request, method, url, **kwargs))
+
+    async def aget(self, url, params=None, **kwargs):
+        return await self.arequest("GET", url, params=params, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        self.session.close()
+
+
+_shared_transport = None
+_shared_lock = threading.Lock()
+
+
+def get_transport():
+    """Returns the process-wide transport shared by all fetchers, creating it on first use."""
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = Transport()
+        return _shared_transport
+
+
+def set_transport(transport):
+    """Replaces the process-wide transport, e.g. to change limits or timeouts."""
+    global _shared_transport
+    with _shared_lock:
+        _shared_transport = transport
@@ -1,5 +1,13 @@
 # paper_fetcher/utils.py
 import logging
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Items buffered between the producers of ``iter_concurrently`` and its consumer.
+QUEUE_SIZE = 1000
 
 
 def setup_logging():
@@ -8,3 +16,107 @@ def setup_logging():
         format='%(asctime)s - %(levelname)s - %(message)s',
         handlers=[logging.StreamHandler()]
     )
+
+
+class StartupProfile:
+    """
+    Measures the phases of a command-line run before its first request and reports how long
+    each took and which heavy dependencies were imported.
+    """
+
+    # Packages whose import dominates startup when they are loaded.
+    HEAVY_MODULES = ("requests", "sqlite3", "schedule", "scholarly", "selenium")
+
+    def __init__(self):
+        self.phases = []
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        """Records the time spent since the previous mark as ``phase``."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self):
+        """Logs the duration of each phase and the heavy modules loaded so far."""
+        lines = ["Startup profile (before the first request):"]
+        lines += [f"  {phase:<22}{elapsed * 1000:8.1f} ms" for phase, elapsed in self.phases]
+        lines.append(f"  {'total':<22}{sum(elapsed for _, elapsed in self.phases) * 1000:8.1f} ms, "
+                     f"{len(sys.modules)} modules loaded")
+        loaded = [name for name in self.HEAVY_MODULES if name in sys.modules]
+        skipped = [name for name in self.HEAVY_MODULES if name not in sys.modules]
+        lines.append(f"  loaded: {', '.join(loaded) or '-'}; not loaded: {', '.join(skipped) or '-'}")
+        logging.info('\n'.join(lines))
+
+
+class _SourceDone:
+    """Marks the end of a source in the queue of ``iter_concurrently``, with its error, if any."""
+
+    def __init__(self, error=None):
+        self.error = error
+
+
+def iter_concurrently(sources, workers, queue_size=QUEUE_SIZE, thread_name_prefix="source"):
+    """
+    Iterates several sources on a thread pool and yields their items as they arrive.
+
+    At most ``workers`` sources run at once; the next source is only taken from ``sources``
+    when one finishes, so ``sources`` may be a lazy generator. Items pass through a bounded
+    queue, so producers wait for a slow consumer instead of buffering without limit. When the
+    consumer stops early, the producers stop at their next item.
+
+    Args:
+        sources (iterable): ``(key, iterable)`` pairs; each iterable is consumed on a worker thread.
+        workers (int): Maximum number of sources consumed at once.
+        queue_size (int, optional): Maximum number of items waiting for the consumer.
+        thread_name_prefix (str, optional): Name prefix of the worker threads.
+
+    Yields:
+        tuple: ``(key, item)`` for every item of every source, in arrival order.
+
+    Raises:
+        Exception: The first error raised by a source, once its earlier items were yielded.
+    """
+    sources = iter(sources)
+    items = queue.Queue(maxsize=queue_size)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(key, iterable):
+        try:
+            for item in iterable:
+                if not put((key, item)):
+                    return
+            put(_SourceDone())
+        except Exception as e:
+            put(_SourceDone(e))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix) as executor:
+        running = 0
+        try:
+            while True:
+                while running < workers:
+                    source = next(sources, None)
+                    if source is None:
+                        break
+                    executor.submit(produce, *source)
+                    running += 1
+                if not running:
+                    return
+                item = items.get()
+                if isinstance(item, _SourceDone):
+                    if item.error:
+                        raise item.error
+                    running -= 1
+                    continue
+                yield item
+        finally:
+            stopped.set()